@@ -0,0 +1,8 @@
+import os
+import sys
+
+# Benchmarks run from a source checkout: make `risk_regime_bro` importable
+# without an install, the same way the test suite is run (PYTHONPATH=src).
+_SRC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+if _SRC not in sys.path:
+    sys.path.insert(0, _SRC)
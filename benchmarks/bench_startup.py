@@ -0,0 +1,111 @@
+"""
+Startup benchmarks for the CLI.
+
+    python benchmarks/bench_startup.py [--runs 20] [--json out.json]
+
+Measures, in fresh interpreters:
+    import_ms       in-process wall time of `import risk_regime_bro.main`
+    importtime_ms   cumulative self-reported time from `python -X importtime`
+    ttfo_cached_ms  time to first snapshot line with `--cached` (no network)
+    ttfo_default_ms time to first snapshot line in the default mode (cache on screen
+                    while the refresh runs; the process is killed after that line)
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SRC = os.path.join(ROOT, "src")
+sys.path.insert(0, SRC)
+
+def _env(cache_path=None):
+    env = dict(os.environ, PYTHONPATH=SRC)
+    if cache_path:
+        env["RISK_REGIME_CACHE"] = cache_path
+    return env
+
+_IMPORT_PROBE = (
+    "import time; t = time.perf_counter(); import risk_regime_bro.main; "
+    "print((time.perf_counter() - t) * 1000)"
+)
+
+def bench_import(runs):
+    env = _env()
+    samples = []
+    for _ in range(runs):
+        out = subprocess.run([sys.executable, "-c", _IMPORT_PROBE], env=env, capture_output=True, text=True, check=True)
+        samples.append(float(out.stdout))
+
+    out = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import risk_regime_bro.main"],
+        env=env, capture_output=True, text=True, check=True
+    )
+    cumulative_us = 0
+    for line in out.stderr.splitlines():
+        if line.rstrip().endswith("risk_regime_bro.main"):
+            cumulative_us = int(line.split("|")[1])
+
+    return {"import_ms": statistics.median(samples), "importtime_ms": cumulative_us / 1000}
+
+def _time_to_line(cmd, env, marker):
+    start = time.perf_counter()
+    proc = subprocess.Popen(cmd, env=env, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+    assert proc.stdout is not None
+    try:
+        for line in proc.stdout:
+            if marker in line:
+                return (time.perf_counter() - start) * 1000
+        return float("nan")
+    finally:
+        proc.kill()
+        proc.wait()
+
+def bench_first_output(runs):
+    from risk_regime_bro import snapshot
+
+    full = {
+        "bitcoin": {tf: {"current": 100.0, "prev": 100.0} for tf in ("1h", "24h", "7d")},
+        "ethereum": {tf: {"current": 104.0, "prev": 100.0} for tf in ("1h", "24h", "7d")},
+        "dogecoin": {tf: {"current": 110.0, "prev": 100.0} for tf in ("1h", "24h", "7d")},
+    }
+    buckets = {"majors": ["ethereum"], "memes": ["dogecoin"]}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = os.path.join(tmp, "snap.json")
+        snapshot.save_snapshot(snapshot.build_snapshot(full, buckets), cache)
+        env = _env(cache)
+        module = [sys.executable, "-m", "risk_regime_bro.main"]
+
+        cached = statistics.median(
+            _time_to_line(module + ["--cached", "--max-age", "1e9"], env, "TIMEFRAME") for _ in range(runs)
+        )
+        default = statistics.median(
+            _time_to_line(module, env, "TIMEFRAME") for _ in range(max(1, runs // 4))
+        )
+
+    return {"ttfo_cached_ms": cached, "ttfo_default_ms": default}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--json", help="Write results to this file")
+    args = parser.parse_args()
+
+    results = {}
+    results.update(bench_import(args.runs))
+    results.update(bench_first_output(args.runs))
+
+    for key, value in results.items():
+        print(f"{key:<18} {value:8.1f}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
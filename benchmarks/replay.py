@@ -0,0 +1,76 @@
+"""Local HTTP server replaying recorded CoinGecko responses."""
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+
+class ReplayServer:
+    """
+    Serves `/coins/markets` from a recorded payload, filtered by the `ids`
+    query parameter like the real endpoint. `latency` (seconds) is added to
+    every response. Point market_data / CoinGeckoProvider at `base_url`.
+
+        with ReplayServer(payload) as server:
+            provider = price_sources.CoinGeckoProvider(base_url=server.base_url)
+    """
+
+    def __init__(self, payload: List[Dict], latency: float = 0.0):
+        self.latency = latency
+        self.requests = 0
+        self._items = {item["id"]: item for item in payload}
+        self._order = [item["id"] for item in payload]
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    @property
+    def base_url(self) -> str:
+        assert self._server is not None, "server not started"
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _markets(self, query: Dict[str, List[str]]) -> bytes:
+        ids = query.get("ids", [""])[0]
+        wanted = set(ids.split(",")) if ids else None
+        body = [self._items[i] for i in self._order if wanted is None or i in wanted]
+        return json.dumps(body).encode()
+
+    def start(self) -> "ReplayServer":
+        replay = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                replay.requests += 1
+                url = urlparse(self.path)
+                if replay.latency:
+                    time.sleep(replay.latency)
+                if url.path.endswith("/coins/markets"):
+                    body = replay._markets(parse_qs(url.query))
+                    self.send_response(200)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                else:
+                    self.send_error(404)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self) -> "ReplayServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
@@ -0,0 +1,294 @@
+"""
+Benchmark and regression suite.
+
+    python -m benchmarks.run                      # run + compare against benchmarks/baseline.json
+    python -m benchmarks.run --update-baseline    # run + overwrite the baseline
+    python -m benchmarks.run --sizes 20,1000 --threshold 0.5 --output results.json
+    python -m benchmarks.run --rounds 9 --min-time 2  # steadier numbers on a noisy machine
+    python -m benchmarks.run --record             # re-record fixtures/coins_markets.json from CoinGecko
+
+Metrics (key = name/universe):
+    parse_ms            json decode + market_data.parse_markets_payload      (lower is better)
+    snapshots_per_s     snapshot.build_snapshot over the 3-timeframe stack   (higher is better)
+    beta_snapshots_per_s  same, beta-adjusted with a BetaTracker             (higher is better)
+    snapshot_kb         memory retained by one refresh: parsed prices + snapshot (tracemalloc; lower is better)
+    refresh_ms_p50/p95  HTTP fetch via the replay server -> consensus -> snapshot (lower is better)
+
+The suite runs --rounds times over and each metric keeps its best pass
+(for p95 the median pass), so a burst of machine noise cannot fail the gate.
+
+Exits with status 1 when any metric is worse than the baseline by more than
+--threshold (0.3 = 30%; env BENCH_THRESHOLD). Tail metrics (*_p95) get
+TAIL_FACTOR times that threshold, and a change is never a regression while its
+absolute size stays under the metric's NOISE_FLOOR (ms per call, or KB).
+
+Timings only compare against a baseline recorded on the same machine and
+Python (see BASELINE_META_KEYS). When the environment differs the table is
+still printed but the gate is skipped with a warning; record a baseline for
+the machine with --update-baseline, or force the gate with --ignore-meta.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Optional
+
+from benchmarks import synthetic
+from benchmarks.replay import ReplayServer
+from risk_regime_bro import market_data, price_sources, risk_engine, snapshot
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+RECORDED = os.path.join(HERE, "fixtures", "coins_markets.json")
+BASELINE = os.path.join(HERE, "baseline.json")
+
+DEFAULT_SIZES = [20, 250, 1000, 10000, 50000]
+# /coins/markets pages at 250 ids, so end-to-end refreshes stop there
+E2E_SIZES = [250]
+
+LOWER, HIGHER = "lower", "higher"
+
+# Results from different machines / interpreters are not comparable
+BASELINE_META_KEYS = ("python", "implementation", "platform", "machine", "cpus")
+
+DEFAULT_ROUNDS = 5
+# Tail latencies swing far more between runs than medians do
+TAIL_FACTOR = 2.0
+# Absolute changes below these never count as regressions. Keyed by metric
+# name (before the "/"); timings are in ms per call, *_per_s metrics are
+# compared as ms per snapshot.
+NOISE_FLOOR = {
+    "parse_ms": 0.05,
+    "snapshots_per_s": 0.05,
+    "beta_snapshots_per_s": 0.05,
+    "snapshot_kb": 2.0,
+    "refresh_ms_p50": 1.0,
+    "refresh_ms_p95": 2.0,
+}
+
+def _timeit(fn: Callable[[], object], min_time: float, max_reps: int = 10000) -> List[float]:
+    """Calls `fn` until `min_time` has elapsed (at least 3 times); returns per-call seconds."""
+    samples = []
+    deadline = time.perf_counter() + min_time
+    while len(samples) < 3 or (time.perf_counter() < deadline and len(samples) < max_reps):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+def _p95(samples: List[float]) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))]
+
+def load_recorded():
+    with open(RECORDED) as f:
+        payload = json.load(f)
+    return payload, market_data.get_bucket_symbols()
+
+def bench_universe(label: str, payload: List[Dict], buckets: Dict[str, List[str]], min_time: float) -> Dict[str, Dict]:
+    metrics: Dict[str, Dict] = {}
+    raw = json.dumps(payload)
+
+    samples = _timeit(lambda: market_data.parse_markets_payload(json.loads(raw)), min_time)
+    metrics[f"parse_ms/{label}"] = {"value": statistics.median(samples) * 1000, "better": LOWER}
+
+    full_data_map = market_data.parse_markets_payload(payload)
+
+    samples = _timeit(lambda: snapshot.build_snapshot(full_data_map, buckets), min_time)
+    metrics[f"snapshots_per_s/{label}"] = {"value": 1 / statistics.median(samples), "better": HIGHER}
+
+    tracker = risk_engine.BetaTracker()
+    samples = _timeit(lambda: snapshot.build_snapshot(full_data_map, buckets, beta_tracker=tracker), min_time)
+    metrics[f"beta_snapshots_per_s/{label}"] = {"value": 1 / statistics.median(samples), "better": HIGHER}
+
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    prices = market_data.parse_markets_payload(payload)
+    snap = snapshot.build_snapshot(prices, buckets)
+    retained = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del prices, snap
+    metrics[f"snapshot_kb/{label}"] = {"value": retained / 1024, "better": LOWER}
+
+    return metrics
+
+def bench_refresh(label: str, payload: List[Dict], buckets: Dict[str, List[str]], min_time: float) -> Dict[str, Dict]:
+    symbols = list({s for syms in buckets.values() for s in syms} | {"bitcoin"})
+    with ReplayServer(payload) as server:
+        fetcher = price_sources.ConsensusPriceFetcher(
+            [price_sources.CoinGeckoProvider(base_url=server.base_url)]
+        )
+        try:
+            def refresh():
+                full_data_map, freshness = fetcher.fetch_with_meta(symbols)
+                return snapshot.build_snapshot(full_data_map, buckets, freshness)
+
+            samples = _timeit(refresh, min_time, max_reps=500)
+        finally:
+            fetcher.close()
+
+    return {
+        f"refresh_ms_p50/{label}": {"value": statistics.median(samples) * 1000, "better": LOWER},
+        f"refresh_ms_p95/{label}": {"value": _p95(samples) * 1000, "better": LOWER},
+    }
+
+def run_suite(
+    sizes: List[int],
+    min_time: float,
+    log: Callable[[str], None] = print,
+    rounds: int = DEFAULT_ROUNDS
+) -> Dict[str, Dict]:
+    """
+    Runs the whole suite `rounds` times, each timing getting min_time / rounds
+    per pass, and keeps each metric's best pass (the median pass for *_p95).
+    Spreading the passes over the run means a burst of machine noise only
+    spoils some of a metric's rounds instead of all of them.
+    """
+    rounds = max(1, rounds)
+    payload, buckets = load_recorded()
+    universes = [("recorded", payload, buckets, True)]
+    for n in sizes:
+        payload, buckets = synthetic.make_universe(n)
+        universes.append((str(n), payload, buckets, n in E2E_SIZES))
+
+    passes: List[Dict[str, Dict]] = []
+    for i in range(rounds):
+        metrics: Dict[str, Dict] = {}
+        for label, payload, buckets, e2e in universes:
+            log(f"round {i + 1}/{rounds}: {label} ...")
+            metrics.update(bench_universe(label, payload, buckets, min_time / rounds))
+            if e2e:
+                metrics.update(bench_refresh(label, payload, buckets, min_time / rounds))
+        passes.append(metrics)
+
+    best: Dict[str, Dict] = {}
+    for key, entry in passes[0].items():
+        values = [p[key]["value"] for p in passes]
+        if key.split("/", 1)[0].endswith("_p95"):
+            value = statistics.median(values)
+        else:
+            value = min(values) if entry["better"] == LOWER else max(values)
+        best[key] = {"value": value, "better": entry["better"]}
+    return best
+
+def _worse_by(entry: Dict, base_value: float) -> float:
+    """Absolute change in the metric's own unit (ms per call for *_per_s), >0 is worse."""
+    if entry["better"] == LOWER:
+        return entry["value"] - base_value
+    return (1 / entry["value"] - 1 / base_value) * 1000
+
+def compare(current: Dict[str, Dict], baseline: Dict[str, Dict], threshold: float) -> List[Dict]:
+    """
+    One row per current metric. `ratio` is the slowdown factor (>1 is worse
+    regardless of direction); `regressed` when ratio > 1 + threshold (times
+    TAIL_FACTOR for *_p95) and the change is larger than the metric's NOISE_FLOOR.
+    """
+    rows = []
+    for key, entry in current.items():
+        base = baseline.get(key)
+        row = {"metric": key, "current": entry["value"], "baseline": None, "ratio": None, "regressed": False}
+        if base and base["value"] > 0 and entry["value"] > 0:
+            if entry["better"] == LOWER:
+                ratio = entry["value"] / base["value"]
+            else:
+                ratio = base["value"] / entry["value"]
+            name = key.split("/", 1)[0]
+            allowed = threshold * (TAIL_FACTOR if name.endswith("_p95") else 1.0)
+            regressed = ratio > 1 + allowed and _worse_by(entry, base["value"]) > NOISE_FLOOR.get(name, 0.0)
+            row.update(baseline=base["value"], ratio=ratio, regressed=regressed)
+        rows.append(row)
+    return rows
+
+def run_meta() -> Dict[str, object]:
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+    }
+
+def meta_mismatch(current: Dict, baseline: Dict) -> List[str]:
+    """BASELINE_META_KEYS on which the two runs differ (missing counts as different)."""
+    return [key for key in BASELINE_META_KEYS if current.get(key) != baseline.get(key)]
+
+def _record(path: str) -> None:
+    symbols = list({s for syms in market_data.get_bucket_symbols().values() for s in syms} | {"bitcoin"})
+    payload = market_data.fetch_markets_payload(symbols)
+    with open(path, "w") as f:
+        json.dump(payload, f, indent=2)
+        f.write("\n")
+    print(f"Recorded {len(payload)} coins to {path}")
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)),
+                        help="Comma-separated synthetic universe sizes")
+    parser.add_argument("--min-time", type=float, default=0.5, help="Seconds spent per timing (across all rounds)")
+    parser.add_argument("--rounds", type=int, default=DEFAULT_ROUNDS, help="Passes over the suite; each metric keeps its best")
+    parser.add_argument("--threshold", type=float, default=float(os.environ.get("BENCH_THRESHOLD", 0.3)),
+                        help="Allowed slowdown before failing (0.3 = 30%%)")
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--output", help="Also write this run's results here")
+    parser.add_argument("--record", action="store_true", help="Re-record the CoinGecko fixture and exit")
+    parser.add_argument("--ignore-meta", action="store_true",
+                        help="Gate even if the baseline was recorded on another machine / Python")
+    args = parser.parse_args(argv)
+
+    if args.record:
+        _record(RECORDED)
+        return 0
+
+    sizes = [int(s) for s in args.sizes.split(",") if s]
+    metrics = run_suite(sizes, args.min_time, rounds=args.rounds)
+    results = {
+        "meta": dict(run_meta(), created=time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())),
+        "metrics": metrics,
+    }
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    baseline, baseline_meta = {}, {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            stored = json.load(f)
+        baseline, baseline_meta = stored.get("metrics", {}), stored.get("meta", {})
+
+    rows = compare(metrics, baseline, args.threshold)
+    print(f"\n{'METRIC':<34} {'CURRENT':>12} {'BASELINE':>12} {'RATIO':>7}")
+    print("-" * 68)
+    for row in rows:
+        base = f"{row['baseline']:>12.3f}" if row["baseline"] is not None else f"{'new':>12}"
+        ratio = f"{row['ratio']:>7.2f}" if row["ratio"] is not None else f"{'':>7}"
+        flag = "  REGRESSION" if row["regressed"] else ""
+        print(f"{row['metric']:<34} {row['current']:>12.3f} {base} {ratio}{flag}")
+
+    if args.update_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=2)
+            f.write("\n")
+        print(f"\nBaseline written to {args.baseline}")
+        return 0
+
+    mismatch = meta_mismatch(results["meta"], baseline_meta) if baseline else []
+    if mismatch and not args.ignore_meta:
+        print(f"\nBaseline was recorded in a different environment ({', '.join(mismatch)}):")
+        for key in mismatch:
+            print(f"  {key}: baseline {baseline_meta.get(key)!r}, now {results['meta'].get(key)!r}")
+        print("Skipping the regression gate; run with --update-baseline to record one here.")
+        return 0
+
+    regressions = [r for r in rows if r["regressed"]]
+    if regressions:
+        print(f"\n{len(regressions)} metric(s) regressed by more than {args.threshold:.0%}.")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
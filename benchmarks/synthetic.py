@@ -0,0 +1,45 @@
+"""Synthetic CoinGecko /coins/markets universes for benchmarking."""
+import random
+from typing import Dict, List, Tuple
+
+from risk_regime_bro import risk_engine
+
+
+def make_payload(n: int, seed: int = 0) -> List[Dict]:
+    """`n` alts plus bitcoin, in the /coins/markets item shape."""
+    rng = random.Random(seed)
+    items = [_item(rng, "bitcoin", "btc", 60000.0)]
+    for i in range(n):
+        items.append(_item(rng, f"coin-{i}", f"c{i}", rng.lognormvariate(0, 3)))
+    return items
+
+def _item(rng: random.Random, coin_id: str, symbol: str, price: float) -> Dict:
+    pct_1h = rng.gauss(0, 0.8)
+    pct_24h = rng.gauss(0, 5)
+    pct_7d = rng.gauss(0, 12)
+    return {
+        "id": coin_id,
+        "symbol": symbol,
+        "name": coin_id.replace("-", " ").title(),
+        "current_price": price,
+        "market_cap": price * rng.uniform(1e6, 1e10),
+        "total_volume": price * rng.uniform(1e4, 1e8),
+        "price_change_percentage_24h": pct_24h,
+        "price_change_percentage_1h_in_currency": pct_1h,
+        "price_change_percentage_24h_in_currency": pct_24h,
+        "price_change_percentage_7d_in_currency": pct_7d,
+        "last_updated": "2026-10-19T12:00:00.000Z",
+    }
+
+def make_buckets(payload: List[Dict]) -> Dict[str, List[str]]:
+    """Spreads every non-BTC coin round-robin across the spec buckets."""
+    names = list(risk_engine.BUCKET_WEIGHTS)
+    buckets: Dict[str, List[str]] = {name: [] for name in names}
+    alts = [item["id"] for item in payload if item["id"] != "bitcoin"]
+    for i, coin_id in enumerate(alts):
+        buckets[names[i % len(names)]].append(coin_id)
+    return buckets
+
+def make_universe(n: int, seed: int = 0) -> Tuple[List[Dict], Dict[str, List[str]]]:
+    payload = make_payload(n, seed)
+    return payload, make_buckets(payload)
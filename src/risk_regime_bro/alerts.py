@@ -0,0 +1,413 @@
+import argparse
+import json
+import queue
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional, Union
+
+from risk_regime_bro import market_data, price_sources, risk_engine, snapshot
+
+# Every input translate_regime branches on
+REGIME_DRIVERS = ("RISK", "Breadth_total", "SpecConc", "majors.wQ", "midcaps.wQ", "memes.wQ")
+
+def scaled_hysteresis(risk_margin: float) -> Dict[str, float]:
+    """
+    Per-driver hysteresis from a single RISK margin. Breadth moves in 1/N steps
+    (0.05 for the 20 tracked alts) and SpecConc is a ratio that swings hard
+    near RISK = 0, so both get 5x the margin (two breadth steps at the 0.02
+    default). Bucket scores scale with their BUCKET_WEIGHTS.
+    """
+    margins = {"RISK": risk_margin, "Breadth_total": 5 * risk_margin, "SpecConc": 5 * risk_margin}
+    for name in REGIME_DRIVERS:
+        if name.endswith(".wQ"):
+            margins[name] = risk_margin * risk_engine.BUCKET_WEIGHTS[name.split(".", 1)[0]]
+    return margins
+
+# Tracked label -> (where the label lives in the results, metrics that drive it)
+TRACKED_FIELDS = {
+    ("regime", "Primary"): (("Regime", "Primary"), REGIME_DRIVERS),
+    ("modifier", "Modifier"): (("Regime", "Modifier"), ("RISK",)),
+    ("intensity", "RiskLevel"): (("Intensities", "RiskLevel"), ("RISK",)),
+    ("intensity", "Participation"): (("Intensities", "Participation"), ("Breadth_total",)),
+    ("intensity", "Structure"): (("Intensities", "Structure"), ("SpecConc",)),
+}
+
+def _metric(results: Dict[str, Any], name: str) -> float:
+    """Top-level metric, or 'bucket.key' for a bucket score."""
+    if "." in name:
+        bucket, key = name.split(".", 1)
+        return float(results["Buckets"].get(bucket, {}).get(key, 0.0))
+    return float(results[name])
+
+def _label(section: str, label_key: str, values: Dict[str, float]) -> str:
+    """Re-derives a tracked label from REGIME_DRIVERS values, as calculate_risk_metrics does."""
+    risk, breadth, spec_conc = values["RISK"], values["Breadth_total"], values["SpecConc"]
+    if section == "Intensities":
+        return risk_engine.get_intensity_labels(risk, breadth, spec_conc)[label_key]
+    buckets = {
+        name.split(".", 1)[0]: {"wQ": value} for name, value in values.items() if name.endswith(".wQ")
+    }
+    return risk_engine.translate_regime(risk, breadth, spec_conc, buckets)[label_key]
+
+class RegimeChangeDetector:
+    """
+    Diffs consecutive timeframe stacks (see risk_engine.calculate_timeframe_stack)
+    and emits regime / intensity / modifier change events.
+
+    Anti-flap controls:
+        debounce_snapshots: a new label must be seen this many snapshots in a row.
+        debounce_seconds: ...and have persisted at least this long.
+        hysteresis: ...and the new label must still hold with every metric
+            driving it pushed back this far toward its value when the old
+            label was confirmed (never past it). A label therefore changes
+            only once the metrics are clearly across the boundary. Either one
+            margin for every REGIME_DRIVERS metric or a dict keyed by driver
+            (missing drivers get 0), since breadth moves in steps of 1/N and
+            the bucket scores are weighted differently from RISK.
+    """
+
+    def __init__(
+        self,
+        debounce_snapshots: int = 1,
+        debounce_seconds: float = 0.0,
+        hysteresis: Union[float, Dict[str, float]] = 0.0
+    ):
+        self.debounce_snapshots = max(1, debounce_snapshots)
+        self.debounce_seconds = debounce_seconds
+        if isinstance(hysteresis, dict):
+            unknown = set(hysteresis) - set(REGIME_DRIVERS)
+            if unknown:
+                raise ValueError(f"Unknown hysteresis metrics: {sorted(unknown)}")
+            self.hysteresis = {name: float(hysteresis.get(name, 0.0)) for name in REGIME_DRIVERS}
+        else:
+            self.hysteresis = dict.fromkeys(REGIME_DRIVERS, float(hysteresis))
+        # (timeframe, kind, field) -> confirmed {'label', 'values'}
+        self._confirmed: Dict[tuple, Dict[str, Any]] = {}
+        # (timeframe, kind, field) -> candidate {'label', 'count', 'since'}
+        self._pending: Dict[tuple, Dict[str, Any]] = {}
+
+    def observe(self, stack: Dict[str, Dict[str, Any]], timestamp: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Feeds one snapshot; returns the change events it confirmed."""
+        now = time.time() if timestamp is None else timestamp
+        events = []
+
+        for tf, results in stack.items():
+            for (kind, field), ((section, label_key), drivers) in TRACKED_FIELDS.items():
+                key = (tf, kind, field)
+                label = results[section][label_key]
+                values = {name: _metric(results, name) for name in REGIME_DRIVERS}
+
+                confirmed = self._confirmed.get(key)
+                if confirmed is None:
+                    # First sighting is the baseline, not a change
+                    self._confirmed[key] = {"label": label, "values": values}
+                    continue
+
+                if label == confirmed["label"]:
+                    self._pending.pop(key, None)
+                    continue
+
+                candidate = self._pending.get(key)
+                if candidate is None or candidate["label"] != label:
+                    candidate = {"label": label, "count": 0, "since": now}
+                    self._pending[key] = candidate
+                candidate["count"] += 1
+
+                if candidate["count"] < self.debounce_snapshots:
+                    continue
+                if now - candidate["since"] < self.debounce_seconds:
+                    continue
+                if not self._holds(section, label_key, label, values, confirmed["values"], drivers):
+                    continue
+
+                events.append({
+                    "timeframe": tf,
+                    "kind": kind,
+                    "field": field,
+                    "old": confirmed["label"],
+                    "new": label,
+                    "metrics": {name: values[name] for name in drivers},
+                    "regime": results["Regime"]["Full"],
+                    "snapshot_ts": now,
+                    "detected_at": time.time()
+                })
+                self._confirmed[key] = {"label": label, "values": values}
+                del self._pending[key]
+
+        return events
+
+    def _holds(
+        self,
+        section: str,
+        label_key: str,
+        label: str,
+        values: Dict[str, float],
+        old_values: Dict[str, float],
+        drivers: tuple
+    ) -> bool:
+        """True if `label` survives moving each driver back by its hysteresis toward `old_values`."""
+        pushed = dict(values)
+        for name in drivers:
+            delta = values[name] - old_values[name]
+            step = min(self.hysteresis[name], abs(delta))
+            pushed[name] = values[name] - step if delta > 0 else values[name] + step
+        return _label(section, label_key, pushed) == label
+
+class CallbackSink:
+    """Local sink handing each batch to a Python callable."""
+
+    def __init__(self, callback: Callable[[List[Dict[str, Any]]], None], name: str = "callback"):
+        self.callback = callback
+        self.name = name
+
+    def send(self, batch: List[Dict[str, Any]]) -> None:
+        self.callback(batch)
+
+class StdoutSink:
+    name = "stdout"
+
+    def send(self, batch: List[Dict[str, Any]]) -> None:
+        for e in batch:
+            print(f"[{e['timeframe']}] {e['field']}: {e['old'] or '-'} -> {e['new'] or '-'} ({e['regime']})")
+
+class JsonlFileSink:
+    """Appends one JSON line per event."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.name = f"file:{path}"
+
+    def send(self, batch: List[Dict[str, Any]]) -> None:
+        with open(self.path, "a") as f:
+            for e in batch:
+                f.write(json.dumps(e) + "\n")
+
+class WebhookSink:
+    """POSTs each batch as {'events': [...]} JSON."""
+
+    def __init__(self, url: str, timeout: float = 5, headers: Optional[Dict[str, str]] = None):
+        self.url = url
+        self.timeout = timeout
+        self.headers = headers or {}
+        self.name = f"webhook:{url}"
+        self._session = None
+
+    def _get_session(self):
+        if self._session is None:
+            import requests
+            self._session = requests.Session()
+        return self._session
+
+    def send(self, batch: List[Dict[str, Any]]) -> None:
+        response = self._get_session().post(self.url, json={"events": batch}, headers=self.headers, timeout=self.timeout)
+        response.raise_for_status()
+
+class _SinkWorker:
+    """Queue + thread for one sink, so a slow or dead sink only delays itself."""
+
+    def __init__(self, sink: Any, dispatcher: "AlertDispatcher"):
+        self.sink = sink
+        self.dispatcher = dispatcher
+        self.queue: queue.Queue = queue.Queue()
+        self.delivered = 0
+        self.failed = 0
+        self.retries = 0
+        self.thread = threading.Thread(
+            target=self._run, name=f"alert-sink-{getattr(sink, 'name', 'sink')}", daemon=True
+        )
+        self.thread.start()
+
+    def _next_batch(self) -> List[Dict[str, Any]]:
+        try:
+            first = self.queue.get(timeout=0.1)
+        except queue.Empty:
+            return []
+        batch = [first]
+        deadline = time.monotonic() + self.dispatcher.max_wait
+        while len(batch) < self.dispatcher.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self.queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _deliver(self, batch: List[Dict[str, Any]]) -> bool:
+        d = self.dispatcher
+        for attempt in range(d.max_retries + 1):
+            try:
+                self.sink.send(batch)
+                return True
+            except Exception as e:
+                if attempt == d.max_retries:
+                    print(f"Alert delivery to {self.sink.name} failed: {e}")
+                    return False
+                with d._lock:
+                    self.retries += 1
+                time.sleep(d.retry_backoff * (2 ** attempt))
+        return False
+
+    def _run(self) -> None:
+        d = self.dispatcher
+        while not (d._stopped.is_set() and self.queue.empty()):
+            batch = self._next_batch()
+            if not batch:
+                continue
+            ok = self._deliver(batch)
+            now = time.time()
+            with d._lock:
+                if ok:
+                    self.delivered += len(batch)
+                    d._latencies.extend(now - e["detected_at"] for e in batch)
+                else:
+                    self.failed += len(batch)
+            for _ in batch:
+                self.queue.task_done()
+
+class AlertDispatcher:
+    """
+    Background batching dispatcher.
+
+    `submit` never blocks the caller. Each sink has its own queue and worker
+    thread that collects events into batches (up to `max_batch`, or whatever
+    arrived within `max_wait` seconds of the first one) and sends them,
+    retrying failures with exponential backoff. A dead webhook therefore only
+    backs up its own queue. Delivery latency (detection -> successful send) is
+    recorded per event and sink and exposed through `stats()`.
+    """
+
+    def __init__(
+        self,
+        sinks: List[Any],
+        max_batch: int = 50,
+        max_wait: float = 0.05,
+        max_retries: int = 3,
+        retry_backoff: float = 0.2
+    ):
+        self.sinks = sinks
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+
+        self._latencies: deque = deque(maxlen=1000)
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._workers = [_SinkWorker(sink, self) for sink in sinks]
+
+    def submit(self, events: List[Dict[str, Any]]) -> None:
+        for worker in self._workers:
+            for e in events:
+                worker.queue.put(e)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Waits until every submitted event has been handled by every sink. Returns False on timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while any(w.queue.unfinished_tasks for w in self._workers):
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(0.005)
+        return True
+
+    def close(self, timeout: float = 5) -> None:
+        self._stopped.set()
+        deadline = time.monotonic() + timeout
+        for worker in self._workers:
+            worker.thread.join(max(0.0, deadline - time.monotonic()))
+
+    def stats(self) -> Dict[str, Any]:
+        """Delivery counters (totals and per sink) plus latency percentiles in seconds."""
+        with self._lock:
+            ordered = sorted(self._latencies)
+            sinks = {
+                w.sink.name: {"delivered": w.delivered, "failed": w.failed, "queued": w.queue.qsize()}
+                for w in self._workers
+            }
+            result: Dict[str, Any] = {
+                "delivered": sum(w.delivered for w in self._workers),
+                "failed": sum(w.failed for w in self._workers),
+                "retries": sum(w.retries for w in self._workers),
+                "queued": sum(w.queue.qsize() for w in self._workers),
+                "sinks": sinks,
+            }
+
+        def pct(p):
+            return ordered[min(len(ordered) - 1, int(p * len(ordered)))] if ordered else 0.0
+
+        result.update({"latency_p50": pct(0.5), "latency_p95": pct(0.95), "latency_max": pct(1.0)})
+        return result
+
+def run_watch(
+    dispatcher: AlertDispatcher,
+    detector: RegimeChangeDetector,
+    interval: float = 60,
+    iterations: Optional[int] = None,
+    cache_path: Optional[str] = None,
+    beta_adjusted: bool = False
+) -> None:
+    """
+    Fetch -> compute snapshot -> diff -> dispatch, every `interval` seconds.
+    With `cache_path`, each snapshot is also persisted there (for the CLI and dashboard).
+    With `beta_adjusted`, a BetaTracker is fed the price change between
+    consecutive snapshots and r_i is computed against its betas.
+    """
+    buckets = market_data.get_bucket_symbols()
+    symbols = list({s for syms in buckets.values() for s in syms} | {"bitcoin"})
+    fetcher = price_sources.default_fetcher()
+    tracker = risk_engine.BetaTracker() if beta_adjusted else None
+
+    count = 0
+    try:
+        while iterations is None or count < iterations:
+            started = time.monotonic()
+            full_data_map, freshness = fetcher.fetch_with_meta(symbols)
+            if full_data_map:
+                snap = snapshot.build_snapshot(full_data_map, buckets, freshness, beta_tracker=tracker)
+                if cache_path:
+                    snapshot.save_snapshot(snap, cache_path)
+                dispatcher.submit(detector.observe(snap["stack"], snap["timestamp"]))
+            count += 1
+            time.sleep(max(0.0, interval - (time.monotonic() - started)))
+    finally:
+        fetcher.close()
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Watch for regime changes and deliver alerts.")
+    parser.add_argument("--webhook", action="append", default=[], help="Webhook URL (repeatable)")
+    parser.add_argument("--jsonl", help="Append events to this JSONL file")
+    parser.add_argument("--interval", type=float, default=60, help="Seconds between snapshots")
+    parser.add_argument("--debounce", type=int, default=2, help="Snapshots a new label must persist")
+    parser.add_argument("--debounce-seconds", type=float, default=0.0)
+    parser.add_argument("--hysteresis", type=float, default=0.02,
+                        help="Margin past a RISK boundary before a label changes (other metrics scale with it)")
+    parser.add_argument("--cache", default=None, help="Snapshot cache file to keep updated")
+    parser.add_argument("--beta-adjusted", action="store_true",
+                        help="Use rolling beta vs BTC for r_i (betas warm up over the first snapshots)")
+    parser.add_argument("--no-save", action="store_true", help="Do not persist snapshots")
+    args = parser.parse_args()
+
+    sinks: List[Any] = [StdoutSink()]
+    sinks.extend(WebhookSink(url) for url in args.webhook)
+    if args.jsonl:
+        sinks.append(JsonlFileSink(args.jsonl))
+
+    dispatcher = AlertDispatcher(sinks)
+    detector = RegimeChangeDetector(args.debounce, args.debounce_seconds, scaled_hysteresis(args.hysteresis))
+    try:
+        cache_path = None if args.no_save else (args.cache or snapshot.default_cache_path())
+        run_watch(
+            dispatcher, detector,
+            interval=args.interval, cache_path=cache_path, beta_adjusted=args.beta_adjusted
+        )
+    except KeyboardInterrupt:
+        pass
+    finally:
+        dispatcher.flush(timeout=5)
+        dispatcher.close()
+        print(f"Alert stats: {dispatcher.stats()}")
+
+if __name__ == "__main__":
+    main()
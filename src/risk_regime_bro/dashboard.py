@@ -0,0 +1,238 @@
+import argparse
+import os
+import shutil
+import sys
+import time
+from collections import deque
+from typing import Any, Dict, List, Optional, TextIO, Tuple
+
+from risk_regime_bro import risk_engine, snapshot
+
+SPARK_CHARS = "▁▂▃▄▅▆▇█"
+
+# Unchanged gaps shorter than this are rewritten instead of paying for
+# another cursor-move escape (ESC [ row ; col H is ~8 bytes).
+_MIN_GAP = 8
+
+def sparkline(values: List[float], width: int) -> str:
+    """Min-max scaled sparkline of the last `width` values."""
+    values = values[-width:]
+    if not values:
+        return ""
+    lo, hi = min(values), max(values)
+    if hi - lo < 1e-12:
+        return SPARK_CHARS[len(SPARK_CHARS) // 2] * len(values)
+    scale = (len(SPARK_CHARS) - 1) / (hi - lo)
+    return "".join(SPARK_CHARS[int(round((v - lo) * scale))] for v in values)
+
+class ScreenBuffer:
+    """
+    Keeps the last frame written to the terminal and emits only the changed
+    cells of each new frame: every row is diffed against the previous one and
+    each changed run is written with a single cursor move. A size change (or
+    the first frame) falls back to a full clear + redraw.
+    """
+
+    def __init__(self, out: TextIO):
+        self.out = out
+        self.rows: List[str] = []
+        self.size: Tuple[int, int] = (0, 0)
+        self.bytes_written = 0
+        self.frames = 0
+
+    def _write(self, data: str) -> None:
+        if data:
+            self.out.write(data)
+            self.out.flush()
+            self.bytes_written += len(data.encode("utf-8"))
+
+    @staticmethod
+    def _changed_runs(old: str, new: str) -> List[Tuple[int, int]]:
+        """[start, end) column ranges where `new` differs from `old` (same length)."""
+        runs: List[Tuple[int, int]] = []
+        start = None
+        gap = 0
+        for col, (a, b) in enumerate(zip(old, new)):
+            if a != b:
+                if start is None:
+                    start = col
+                elif gap >= _MIN_GAP:
+                    runs.append((start, col - gap))
+                    start = col
+                gap = 0
+            elif start is not None:
+                gap += 1
+        if start is not None:
+            runs.append((start, len(new) - gap))
+        return runs
+
+    def draw(self, lines: List[str], size: Tuple[int, int]) -> None:
+        width, height = size
+        rows = [line[:width].ljust(width) for line in lines[:height]]
+        rows += [" " * width] * (height - len(rows))
+
+        if size != self.size:
+            # Full redraw; the last row skips the final column to avoid scrolling
+            body = "\r\n".join(rows)[:-1] if rows else ""
+            self._write("\x1b[H\x1b[2J" + body)
+        else:
+            parts = []
+            for i, (old, new) in enumerate(zip(self.rows, rows)):
+                if old == new:
+                    continue
+                for start, end in self._changed_runs(old, new):
+                    if i == height - 1:
+                        end = min(end, width - 1)
+                    if start >= end:
+                        continue
+                    parts.append(f"\x1b[{i + 1};{start + 1}H{new[start:end]}")
+            self._write("".join(parts))
+
+        self.rows = rows
+        self.size = size
+        self.frames += 1
+
+class Dashboard:
+    """
+    Live view over snapshot objects (see snapshot.build_snapshot). It never
+    fetches: feed it with `update(snapshot)` or let `run` follow the snapshot
+    cache file written by the CLI refresh or the alerts watcher.
+    """
+
+    def __init__(self, history: int = 120):
+        self.snapshot: Optional[Dict[str, Any]] = None
+        self.risk_history: Dict[str, deque] = {tf: deque(maxlen=history) for tf in risk_engine.TIMEFRAMES}
+        self.regime_changes: deque = deque(maxlen=5)
+
+    def update(self, snap: Dict[str, Any]) -> bool:
+        """Accepts a snapshot; returns False if it is not newer than the current one."""
+        if self.snapshot is not None and snap.get("timestamp", 0) <= self.snapshot.get("timestamp", 0):
+            return False
+
+        previous = self.snapshot["stack"] if self.snapshot else {}
+        for tf, results in snap["stack"].items():
+            if tf in self.risk_history:
+                self.risk_history[tf].append(float(results["RISK"]))
+            before = previous.get(tf)
+            if before and before["Regime"]["Primary"] != results["Regime"]["Primary"]:
+                self.regime_changes.append(
+                    (snap["timestamp"], tf, before["Regime"]["Primary"], results["Regime"]["Primary"])
+                )
+
+        self.snapshot = snap
+        return True
+
+    def render_lines(self, width: int, now: Optional[float] = None) -> List[str]:
+        now = time.time() if now is None else now
+        rule = "=" * width
+        thin = "-" * width
+
+        title = "Risk Regime Bro — live"
+        if self.snapshot is None:
+            return [title, rule, "Waiting for the first snapshot..."]
+
+        snap = self.snapshot
+        stack = snap["stack"]
+        age = snapshot.format_age(snapshot.snapshot_age(snap, now))
+        stale = sum(1 for m in snap.get("freshness", {}).values() if m.get("stale"))
+        status = f"snapshot {age} old" + (f", {stale} stale" if stale else "")
+        if snap.get("beta_adjusted"):
+            status = f"beta-adjusted, {status}"
+
+        lines = [f"{title}{status:>{max(0, width - len(title))}}", rule]
+
+        spark_width = max(8, min(40, width - 72))
+        lines.append(f"{'TF':<5} {'RISK':>8}  {'REGIME':<55} {'HISTORY'}")
+        for tf in risk_engine.TIMEFRAMES:
+            results = stack.get(tf)
+            if not results:
+                lines.append(f"{tf:<5} {'N/A':>8}  {'(Missing BTC data)':<55}")
+                continue
+            spark = sparkline(list(self.risk_history[tf]), spark_width)
+            lines.append(f"{tf:<5} {results['RISK']:>+8.4f}  {results['Regime']['Full'][:55]:<55} {spark}")
+        lines.append(thin)
+
+        lines.append(f"{'TF':<5} {'Risk Level':<20} {'Participation':<14} {'Structure':<18} {'Breadth':>8} {'SpecConc':>9} {'BTC':>8}")
+        for tf in risk_engine.TIMEFRAMES:
+            results = stack.get(tf)
+            if not results:
+                continue
+            i = results["Intensities"]
+            lines.append(
+                f"{tf:<5} {i['RiskLevel']:<20} {i['Participation']:<14} {i['Structure']:<18} "
+                f"{results['Breadth_total']:>8.1%} {results['SpecConc']:>9.2f} {results['BTC_Return']:>8.2%}"
+            )
+        lines.append(thin)
+
+        tfs = [tf for tf in risk_engine.TIMEFRAMES if tf in stack]
+        lines.append(f"{'Bucket':<12}" + "".join(f" {tf + ' wQ':>9} {tf + ' B':>7}" for tf in tfs))
+        bucket_names = list(next(iter(stack.values()))["Buckets"]) if stack else []
+        for bucket in bucket_names:
+            row = f"{bucket:<12}"
+            for tf in tfs:
+                res = stack[tf]["Buckets"].get(bucket, {})
+                row += f" {res.get('wQ', 0.0):>+9.4f} {res.get('B_b', 0.0):>7.0%}"
+            lines.append(row)
+        lines.append(thin)
+
+        lines.append("Regime changes:")
+        for ts, tf, old, new in reversed(self.regime_changes):
+            lines.append(f"  {time.strftime('%H:%M:%S', time.localtime(ts))} {tf:<4} {old} -> {new}")
+
+        return lines
+
+class SnapshotFileSource:
+    """Yields the cached snapshot whenever the file's mtime changes (one stat per poll)."""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or snapshot.default_cache_path()
+        self._mtime = None
+
+    def poll(self) -> Optional[Dict[str, Any]]:
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except OSError:
+            return None
+        if mtime == self._mtime:
+            return None
+        self._mtime = mtime
+        return snapshot.load_snapshot(self.path)
+
+def run(
+    source: SnapshotFileSource,
+    interval: float = 1.0,
+    out: TextIO = sys.stdout,
+    iterations: Optional[int] = None
+) -> ScreenBuffer:
+    """Main loop: poll the source, redraw the changed cells, sleep."""
+    dashboard = Dashboard()
+    screen = ScreenBuffer(out)
+    # Alternate screen + hidden cursor; restored on exit
+    out.write("\x1b[?1049h\x1b[?25l")
+    count = 0
+    try:
+        while iterations is None or count < iterations:
+            snap = source.poll()
+            if snap is not None:
+                dashboard.update(snap)
+            size = shutil.get_terminal_size()
+            screen.draw(dashboard.render_lines(size.columns), (size.columns, size.lines))
+            count += 1
+            if iterations is None or count < iterations:
+                time.sleep(interval)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        out.write("\x1b[?25h\x1b[?1049l")
+        out.flush()
+    return screen
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Live dashboard over persisted snapshots (never fetches).")
+    parser.add_argument("--cache", default=None, help="Snapshot cache file to follow")
+    parser.add_argument("--interval", type=float, default=1.0, help="Seconds between redraws")
+    args = parser.parse_args(argv)
+    run(SnapshotFileSource(args.cache), interval=args.interval)
+
+if __name__ == "__main__":
+    main()
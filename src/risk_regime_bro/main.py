@@ -1,81 +1,244 @@
+import argparse
+import os
 import sys
-from risk_regime_bro import market_data, risk_engine
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+# Only stdlib + light project modules at import time: requests / numpy are
+# pulled in by the refresh path, so a cached render never pays for them.
+from risk_regime_bro import market_data, risk_engine, snapshot
+
+
+def fetch_snapshot(log: Callable[[str], None] = print) -> Optional[Dict[str, Any]]:
+    """
+    Fetches prices and computes a fresh snapshot. None if no data came back.
+    Diagnostics (e.g. a failed price source) go to `log`.
+    """
+    from risk_regime_bro import price_sources
 
-def main() -> None:
-    print("--- Risk Regime Bro ---")
-    
-    # 1. Define Universe
     buckets = market_data.get_bucket_symbols()
     all_symbols = []
     for syms in buckets.values():
         all_symbols.extend(syms)
-        
-    print(f"Tracking {len(all_symbols)} assets across {len(buckets)} buckets.")
-    
-    # 2. Fetch Data
-    print("Fetching market data from CoinGecko... (1h, 24h, 7d)")
     symbols_to_fetch = list(set(all_symbols + ["bitcoin"]))
-    
-    full_data_map = market_data.fetch_historical_prices(symbols_to_fetch)
-    
+
+    fetcher = price_sources.default_fetcher(log=log)
+    try:
+        full_data_map, freshness = fetcher.fetch_with_meta(symbols_to_fetch)
+    finally:
+        fetcher.close()
+
     if not full_data_map:
-        print("Failed to fetch data.")
-        return
+        return None
+    return snapshot.build_snapshot(full_data_map, buckets, freshness)
+
+def render_snapshot(
+    snap: Dict[str, Any],
+    cached: bool = False,
+    refreshing: bool = False,
+    now: Optional[float] = None
+) -> List[str]:
+    """Renders the timeframe stack + 24h deep dive as lines of text."""
+    lines = []
+    if cached:
+        age = snapshot.format_age(snapshot.snapshot_age(snap, now))
+        lines.append(f"Snapshot: {age} old (cached{', refreshing...' if refreshing else ''})")
+    else:
+        lines.append("Snapshot: live")
+
+    freshness = snap.get("freshness", {})
+    single_source = sum(1 for m in freshness.values() if len(m['sources']) == 1)
+    if single_source:
+        lines.append(f"{single_source} assets priced from a single source.")
 
-    print("\n" + "="*60)
-    print(f"{'TIMEFRAME':<10} {'RISK':<10} {'REGIME'}")
-    print("="*60)
-
-    timeframes = ['1h', '24h', '7d']
-    
-    for tf in timeframes:
-        # Slice data for this timeframe
-        current_map = {}
-        for sym, windows in full_data_map.items():
-            if tf in windows:
-                current_map[sym] = windows[tf]
-        
-        btc_data = current_map.get("bitcoin")
-        if not btc_data:
-            print(f"{tf:<10} N/A        (Missing BTC data)")
+    lines.append("")
+    lines.append("="*60)
+    lines.append(f"{'TIMEFRAME':<10} {'RISK':<10} {'REGIME'}")
+    lines.append("="*60)
+
+    stack = snap["stack"]
+
+    for tf in risk_engine.TIMEFRAMES:
+        results = stack.get(tf)
+        if not results:
+            lines.append(f"{tf:<10} N/A        (Missing BTC data)")
             continue
-            
-        results = risk_engine.calculate_risk_metrics(current_map, btc_data, buckets)
+
         regime = results['Regime']['Full']
         risk_val = results['RISK']
-        
+
         # Color/Intensity Formatting (Text-based)
-        print(f"{tf:<10} {risk_val:<10.4f} {regime}")
-        
-    print("="*60 + "\n")
-    
+        lines.append(f"{tf:<10} {risk_val:<10.4f} {regime}")
+
+    lines.append("="*60)
+    lines.append("")
+
     # Detailed Breakdown for 24h (Standard Pulse)
-    print("--- 24h Deep Dive ---")
-    
-    # Re-extract 24h for detail print
-    tf_24 = '24h'
-    map_24 = {s: w[tf_24] for s, w in full_data_map.items() if tf_24 in w}
-    btc_24 = map_24.get("bitcoin")
-    
-    if btc_24:
-        results = risk_engine.calculate_risk_metrics(map_24, btc_24, buckets)
+    lines.append("--- 24h Deep Dive ---")
+
+    results = stack.get('24h')
+
+    if results:
         intensities = results['Intensities']
-        
-        print(f"Risk Level:     {intensities['RiskLevel']}")
-        print(f"Participation:  {intensities['Participation']}")
-        print(f"Structure:      {intensities['Structure']}")
-        print()
-        print(f"Breadth:    {results['Breadth_total']:.2%}")
-        print(f"Spec Conc:  {results['SpecConc']:.2f}")
-        print(f"BTC Return: {results['BTC_Return']:.2%}")
-        
-        print("\nBucket Breakdown:")
-        print(f"{'Bucket':<15} {'Score (weighted)':<20} {'Raw Q'}")
-        print("-" * 45)
-        
+
+        lines.append(f"Risk Level:     {intensities['RiskLevel']}")
+        lines.append(f"Participation:  {intensities['Participation']}")
+        lines.append(f"Structure:      {intensities['Structure']}")
+        lines.append("")
+        lines.append(f"Breadth:    {results['Breadth_total']:.2%}")
+        lines.append(f"Spec Conc:  {results['SpecConc']:.2f}")
+        lines.append(f"BTC Return: {results['BTC_Return']:.2%}")
+
+        lines.append("")
+        lines.append("Bucket Breakdown:")
+        lines.append(f"{'Bucket':<15} {'Score (weighted)':<20} {'Raw Q'}")
+        lines.append("-" * 45)
+
         for bucket, res in results['Buckets'].items():
-            print(f"{bucket:<15} {res['wQ']:<20.4f} {res['Q_b']:.4f}")
+            lines.append(f"{bucket:<15} {res['wQ']:<20.4f} {res['Q_b']:.4f}")
+
+    return lines
+
+def _spawn_background_refresh(cache_path: str) -> None:
+    """
+    Starts a detached `--refresh-only` process so the next invocation is fresh.
+    A lock file, created with O_EXCL so exactly one of many prompts / tmux
+    panes starting together wins, keeps them from refreshing at once. A lock
+    older than 60 s is left over from a refresh that died and is replaced.
+    """
+    import subprocess
+    import time
+
+    lock = cache_path + ".lock"
+    flags = os.O_CREAT | os.O_EXCL | os.O_WRONLY
+    try:
+        os.makedirs(os.path.dirname(lock) or ".", exist_ok=True)
+        fd = os.open(lock, flags)
+    except FileExistsError:
+        try:
+            if time.time() - os.path.getmtime(lock) < 60:
+                return
+            os.remove(lock)
+            fd = os.open(lock, flags)
+        except OSError:
+            return
+    except OSError:
+        return
+    with os.fdopen(fd, "w") as f:
+        f.write(str(os.getpid()))
+
+    subprocess.Popen(
+        [sys.executable, "-m", "risk_regime_bro.main", "--refresh-only", "--cache", cache_path],
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        start_new_session=True
+    )
 
+def _refresh_and_save(cache_path: str, log: Callable[[str], None] = print) -> Optional[Dict[str, Any]]:
+    snap = fetch_snapshot(log=log)
+    if snap is not None:
+        snapshot.save_snapshot(snap, cache_path)
+    return snap
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(prog="risk_regime_bro", description="Alt risk appetite vs BTC.")
+    parser.add_argument("--cached", action="store_true",
+                        help="Print the last snapshot and exit; refresh in a detached process if older than --max-age")
+    parser.add_argument("--max-age", type=float, default=None,
+                        help="Skip the refresh when the cached snapshot is younger than this (seconds)")
+    parser.add_argument("--dashboard", action="store_true",
+                        help="Live full-screen view following the snapshot cache (never fetches)")
+    parser.add_argument("--no-cache", action="store_true", help="Ignore the persisted snapshot")
+    parser.add_argument("--refresh-only", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--cache", default=None, help="Snapshot cache file")
+    args = parser.parse_args(argv)
+
+    cache_path = args.cache or snapshot.default_cache_path()
+
+    if args.dashboard:
+        from risk_regime_bro import dashboard
+        dashboard.run(dashboard.SnapshotFileSource(cache_path))
+        return
+
+    if args.refresh_only:
+        try:
+            _refresh_and_save(cache_path)
+        finally:
+            try:
+                os.remove(cache_path + ".lock")
+            except OSError:
+                pass
+        return
+
+    cached = None if args.no_cache else snapshot.load_snapshot(cache_path)
+    max_age = args.max_age if args.max_age is not None else (60.0 if args.cached else 0.0)
+    cache_fresh = cached is not None and snapshot.snapshot_age(cached) < max_age
+
+    if args.cached:
+        if cached is None:
+            print("No cached snapshot yet.")
+        else:
+            print("\n".join(render_snapshot(cached, cached=True)))
+        if not cache_fresh:
+            _spawn_background_refresh(cache_path)
+        return
+
+    print("--- Risk Regime Bro ---")
+
+    # 1. Define Universe
+    buckets = market_data.get_bucket_symbols()
+    all_symbols = []
+    for syms in buckets.values():
+        all_symbols.extend(syms)
+
+    print(f"Tracking {len(all_symbols)} assets across {len(buckets)} buckets.")
+
+    if cached is not None and cache_fresh:
+        print("\n".join(render_snapshot(cached, cached=True)))
+        print("\nDone.")
+        return
+
+    # 2. Fetch Data in the background while the last snapshot is on screen.
+    # Its diagnostics are held back until after the redraw, which moves the
+    # cursor up by exactly the lines printed here.
+    fresh: Dict[str, Any] = {}
+    notes: List[str] = []
+    worker = threading.Thread(
+        target=lambda: fresh.update(snap=_refresh_and_save(cache_path, log=notes.append)),
+        daemon=True
+    )
+    worker.start()
+
+    shown = 0
+    if cached is not None:
+        cached_lines = render_snapshot(cached, cached=True, refreshing=True)
+        print("\n".join(cached_lines), flush=True)
+        shown = len(cached_lines)
+    else:
+        print("Fetching market data from CoinGecko + Binance... (1h, 24h, 7d)", flush=True)
+        shown = 1
+
+    worker.join()
+    snap = fresh.get("snap")
+
+    if snap is None:
+        for note in notes:
+            print(note)
+        if cached is None:
+            print("Failed to fetch data.")
+        else:
+            print(f"\nRefresh failed; showing snapshot from {snapshot.format_age(snapshot.snapshot_age(cached))} ago.")
+        return
+
+    if sys.stdout.isatty():
+        # Redraw in place: cursor up over the previous render, clear to end of screen
+        sys.stdout.write(f"\x1b[{shown}F\x1b[J")
+    else:
+        print()
+    print("\n".join(render_snapshot(snap)))
+    for note in notes:
+        print(note)
     print("\nDone.")
 
 if __name__ == "__main__":
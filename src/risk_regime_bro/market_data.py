@@ -1,8 +1,9 @@
-import requests
-import pandas as pd
 from typing import Dict, List, Optional
 import time
 
+# requests is imported inside the fetch functions: it costs ~70 ms at import
+# time and the CLI can render a cached snapshot without touching the network.
+
 # Static Bucket Definitions (as per success.md requirements roughly mapped to current market)
 BUCKETS = {
     "majors": ["ethereum", "solana", "binancecoin"],
@@ -26,6 +27,8 @@ BUCKET_MAPPING = {
     "memes": ["dogecoin", "shiba-inu", "popcat", "morg-2"] # Pure memes
 }
 
+COINGECKO_API_URL = "https://api.coingecko.com/api/v3"
+
 def get_bucket_symbols() -> Dict[str, List[str]]:
     return BUCKET_MAPPING
 
@@ -44,12 +47,14 @@ def fetch_current_prices(symbols: List[str]) -> Dict[str, float]:
     
     # CoinGecko allows multiple IDs comma separated
     ids_str = ",".join(symbols)
-    url = "https://api.coingecko.com/api/v3/simple/price"
+    url = f"{COINGECKO_API_URL}/simple/price"
     params = {
         "ids": ids_str,
         "vs_currencies": "usd"
     }
     
+    import requests
+
     try:
         response = requests.get(url, params=params, timeout=10)
         response.raise_for_status()
@@ -64,6 +69,30 @@ def fetch_current_prices(symbols: List[str]) -> Dict[str, float]:
         print(f"Error fetching current prices: {e}")
         return {}
 
+def fetch_markets_payload(
+    symbols: List[str],
+    timeout: float = 10,
+    base_url: str = COINGECKO_API_URL
+) -> List[Dict]:
+    """
+    Raw CoinGecko /coins/markets call with 1h, 24h, 7d changes for all symbols in one go.
+    Raises on HTTP / network errors; callers decide how to degrade.
+    """
+    import requests
+
+    params = {
+        "vs_currency": "usd",
+        "ids": ",".join(symbols),
+        "order": "market_cap_desc",
+        "per_page": 250,
+        "page": 1,
+        "sparkline": "false",
+        "price_change_percentage": "1h,24h,7d" 
+    }
+    response = requests.get(f"{base_url}/coins/markets", params=params, timeout=timeout)
+    response.raise_for_status()
+    return response.json()
+
 def fetch_historical_prices(symbols: List[str], days: int = 1) -> Dict[str, float]:
     """
     Fetches historical prices (L days ago) to calculate returns.
@@ -85,66 +114,59 @@ def fetch_historical_prices(symbols: List[str], days: int = 1) -> Dict[str, floa
     Let's assume L=24h for the default 'Risk Regime' calculation as it's the standard daily pulse.
     """
     
-    # We will use coins/markets to get 1h, 24h, 7d changes for all symbols in one go.
-    ids_str = ",".join(symbols)
-    url = "https://api.coingecko.com/api/v3/coins/markets"
-    params = {
-        "vs_currency": "usd",
-        "ids": ids_str,
-        "order": "market_cap_desc",
-        "per_page": 250,
-        "page": 1,
-        "sparkline": "false",
-        "price_change_percentage": "1h,24h,7d" 
-    }
-    
     try:
-        response = requests.get(url, params=params, timeout=10)
-        response.raise_for_status()
-        data = response.json()
+        data = fetch_markets_payload(symbols)
+        return parse_markets_payload(data)
         
-        # Structure: symbol -> time_window -> {'current':, 'prev':}
-        # Windows: '1h', '24h', '7d'
-        result = {}
+    except Exception as e:
+        print(f"Error fetching market data: {e}")
+        return {}
+
+def parse_markets_payload(data: List[Dict]) -> Dict[str, Dict[str, Dict[str, float]]]:
+    """
+    Converts a CoinGecko /coins/markets payload into per-window prices.
+
+    Returns:
+        Dict mapping symbol -> window ('1h', '24h', '7d') -> {'current', 'prev'}.
+    """
+    # Structure: symbol -> time_window -> {'current':, 'prev':}
+    # Windows: '1h', '24h', '7d'
+    result = {}
+    
+    for item in data:
+        sym = item['id']
+        current_price = item['current_price']
         
-        for item in data:
-            sym = item['id']
-            current_price = item['current_price']
+        if current_price is None:
+            continue
             
-            if current_price is None:
-                continue
-                
-            # CoinGecko keys for percentages:
-            # price_change_percentage_1h_in_currency
-            # price_change_percentage_24h (sometimes just this) or _in_currency
-            # price_change_percentage_7d_in_currency
+        # CoinGecko keys for percentages:
+        # price_change_percentage_1h_in_currency
+        # price_change_percentage_24h (sometimes just this) or _in_currency
+        # price_change_percentage_7d_in_currency
+        
+        windows = {
+            '1h': item.get('price_change_percentage_1h_in_currency'),
+            '24h': item.get('price_change_percentage_24h'), # Standard field
+            '7d': item.get('price_change_percentage_7d_in_currency')
+        }
+        
+        sym_data = {}
+        for window, pct_change in windows.items():
+            if pct_change is None:
+                # Fallback or skip. If missing 1h, maybe just set prev=current (0% change)
+                prev_price = current_price
+            else:
+                prev_price = current_price / (1 + pct_change / 100.0)
             
-            windows = {
-                '1h': item.get('price_change_percentage_1h_in_currency'),
-                '24h': item.get('price_change_percentage_24h'), # Standard field
-                '7d': item.get('price_change_percentage_7d_in_currency')
+            sym_data[window] = {
+                "current": current_price,
+                "prev": prev_price
             }
-            
-            sym_data = {}
-            for window, pct_change in windows.items():
-                if pct_change is None:
-                    # Fallback or skip. If missing 1h, maybe just set prev=current (0% change)
-                    prev_price = current_price
-                else:
-                    prev_price = current_price / (1 + pct_change / 100.0)
-                
-                sym_data[window] = {
-                    "current": current_price,
-                    "prev": prev_price
-                }
-            
-            result[sym] = sym_data
-            
-        return result
         
-    except Exception as e:
-        print(f"Error fetching market data: {e}")
-        return {}
+        result[sym] = sym_data
+        
+    return result
 
 def fetch_btc_price_data() -> Dict[str, float]:
     """Convenience for just BTC."""
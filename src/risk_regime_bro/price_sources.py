@@ -0,0 +1,456 @@
+import json
+import os
+import statistics
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from risk_regime_bro import market_data, snapshot
+
+# Every provider returns the same shape as market_data.fetch_historical_prices:
+#   canonical id (CoinGecko id) -> window ('1h', '24h', '7d') -> {'current', 'prev'}
+WINDOWS = ['1h', '24h', '7d']
+
+def _run_daemon(fn, *args, name: str = "price") -> Future:
+    """
+    Runs `fn(*args)` on a daemon thread. Unlike a ThreadPoolExecutor worker,
+    a call abandoned by hedging or the deadline never holds up interpreter
+    exit, so a one-shot run ends as soon as it has its answer.
+    """
+    future: Future = Future()
+    future.set_running_or_notify_cancel()
+
+    def target():
+        try:
+            future.set_result(fn(*args))
+        except BaseException as e:
+            future.set_exception(e)
+
+    threading.Thread(target=target, name=name, daemon=True).start()
+    return future
+
+class PriceProvider:
+    """
+    A single upstream price source.
+
+    Symbols are always addressed by their CoinGecko id (the canonical id used by
+    BUCKET_MAPPING). `id_map` translates canonical ids to the provider's own
+    identifiers; `None` means the provider uses canonical ids directly.
+    Subclasses implement `fetch_native` and raise on failure.
+    """
+
+    name = "provider"
+    id_map: Optional[Dict[str, str]] = None
+
+    def supports(self, symbol: str) -> bool:
+        return self.id_map is None or symbol in self.id_map
+
+    def to_native(self, symbols: List[str]) -> Dict[str, str]:
+        """Native id -> canonical id for the symbols this provider can quote."""
+        if self.id_map is None:
+            return {s: s for s in symbols}
+        return {self.id_map[s]: s for s in symbols if s in self.id_map}
+
+    def fetch_native(self, native_ids: List[str]) -> Dict[str, Dict[str, Dict[str, float]]]:
+        raise NotImplementedError
+
+    def fetch(self, symbols: List[str]) -> Dict[str, Dict[str, Dict[str, float]]]:
+        native = self.to_native(symbols)
+        if not native:
+            return {}
+        data = self.fetch_native(list(native))
+        return {native[n]: windows for n, windows in data.items() if n in native}
+
+class CoinGeckoProvider(PriceProvider):
+    name = "coingecko"
+
+    def __init__(self, timeout: float = 10, base_url: str = market_data.COINGECKO_API_URL):
+        self.timeout = timeout
+        self.base_url = base_url
+
+    def fetch_native(self, native_ids):
+        payload = market_data.fetch_markets_payload(native_ids, timeout=self.timeout, base_url=self.base_url)
+        return market_data.parse_markets_payload(payload)
+
+# CoinGecko id -> Binance spot USDT pair. Coins not listed here are simply not
+# quoted by Binance and fall back to the remaining providers.
+BINANCE_SYMBOLS = {
+    "bitcoin": "BTCUSDT",
+    "ethereum": "ETHUSDT",
+    "solana": "SOLUSDT",
+    "binancecoin": "BNBUSDT",
+    "ripple": "XRPUSDT",
+    "cardano": "ADAUSDT",
+    "avalanche-2": "AVAXUSDT",
+    "near": "NEARUSDT",
+    "polkadot": "DOTUSDT",
+    "aptos": "APTUSDT",
+    "sui": "SUIUSDT",
+    "arbitrum": "ARBUSDT",
+    "optimism": "OPUSDT",
+    "sei-network": "SEIUSDT",
+    "pepe": "PEPEUSDT",
+    "dogwifhat": "WIFUSDT",
+    "bonk": "BONKUSDT",
+    "dogecoin": "DOGEUSDT",
+    "shiba-inu": "SHIBUSDT",
+}
+
+class BinanceProvider(PriceProvider):
+    """
+    Binance rolling-window ticker. The endpoint takes a single windowSize, so
+    the three windows are requested concurrently and the whole call is bounded
+    by `timeout`; open price of the window is used as 'prev'.
+    """
+
+    name = "binance"
+    url = "https://api.binance.com/api/v3/ticker"
+    window_sizes = {'1h': '1h', '24h': '1d', '7d': '7d'}
+
+    def __init__(self, timeout: float = 10, id_map: Optional[Dict[str, str]] = None):
+        self.timeout = timeout
+        self.id_map = id_map if id_map is not None else BINANCE_SYMBOLS
+
+    def _fetch_window(self, symbols_param: str, size: str) -> List[Dict[str, Any]]:
+        import requests
+
+        response = requests.get(
+            self.url,
+            params={"symbols": symbols_param, "windowSize": size, "type": "MINI"},
+            timeout=self.timeout
+        )
+        response.raise_for_status()
+        return response.json()
+
+    def fetch_native(self, native_ids):
+        symbols_param = "[" + ",".join(f'"{s}"' for s in native_ids) + "]"
+        result: Dict[str, Dict[str, Dict[str, float]]] = {}
+
+        futures = {
+            _run_daemon(self._fetch_window, symbols_param, size, name="binance"): window
+            for window, size in self.window_sizes.items()
+        }
+        done, not_done = wait(futures, timeout=self.timeout)
+        if not_done:
+            raise TimeoutError(f"binance windows timed out: {sorted(futures[f] for f in not_done)}")
+        for future in done:
+            window = futures[future]
+            for item in future.result():
+                result.setdefault(item['symbol'], {})[window] = {
+                    "current": float(item['lastPrice']),
+                    "prev": float(item['openPrice'])
+                }
+
+        return result
+
+class StubProvider(PriceProvider):
+    """
+    Local provider serving fixed prices, for tests and offline runs.
+    `delay` (seconds) simulates latency; `fail=True` simulates an outage.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        prices: Dict[str, Dict[str, Dict[str, float]]],
+        delay: float = 0.0,
+        fail: bool = False,
+        id_map: Optional[Dict[str, str]] = None
+    ):
+        self.name = name
+        self.prices = prices
+        self.delay = delay
+        self.fail = fail
+        self.id_map = id_map
+        self.calls = 0
+
+    def fetch_native(self, native_ids):
+        self.calls += 1
+        if self.delay:
+            time.sleep(self.delay)
+        if self.fail:
+            raise ConnectionError(f"{self.name} unavailable")
+        return {n: self.prices[n] for n in native_ids if n in self.prices}
+
+class ConsensusPriceFetcher:
+    """
+    Queries several providers concurrently and merges their quotes.
+
+    - Hedging: if a provider has not answered after its p95 latency (or
+      `initial_hedge_delay` until enough samples exist), a backup request is
+      sent to the same provider and whichever returns first wins. A fast
+      failure triggers the backup immediately.
+    - Resolution: mode "median" takes the per-symbol median of whatever has
+      answered `median_grace` seconds after the first answer (waiting longer
+      only for symbols nobody has quoted yet); mode "quorum" returns as soon as
+      every symbol has `quorum` quotes. Both are per symbol: a provider only
+      counts for the symbols it maps, and both are capped by `timeout`.
+      Providers left behind once the round is resolved are not failures; their
+      calls finish in the background and still feed the latency samples.
+    - Latency samples can be persisted to `latency_path` so one-shot CLI runs
+      still hedge at the observed p95 instead of `initial_hedge_delay`.
+    - Freshness: symbols missing from this round are served from the last good
+      snapshot and marked stale, so one provider outage does not empty the
+      snapshot.
+    """
+
+    def __init__(
+        self,
+        providers: List[PriceProvider],
+        mode: str = "median",
+        quorum: int = 1,
+        timeout: float = 10,
+        initial_hedge_delay: float = 2.0,
+        min_latency_samples: int = 5,
+        max_stale_age: float = 900,
+        median_grace: float = 0.5,
+        latency_path: Optional[str] = None,
+        log: Callable[[str], None] = print
+    ):
+        if mode not in ("median", "quorum"):
+            raise ValueError(f"Unknown consensus mode: {mode}")
+        if not providers:
+            raise ValueError("At least one provider is required")
+
+        self.providers = providers
+        self.mode = mode
+        self.quorum = max(1, min(quorum, len(providers)))
+        self.timeout = timeout
+        self.initial_hedge_delay = initial_hedge_delay
+        self.min_latency_samples = min_latency_samples
+        self.max_stale_age = max_stale_age
+        self.median_grace = median_grace
+        self.latency_path = latency_path
+        self.log = log
+
+        self._latencies: Dict[str, deque] = {p.name: deque(maxlen=200) for p in providers}
+        # Calls abandoned by a round still record their latency when they finish
+        self._latency_lock = threading.Lock()
+        self._last_good: Dict[str, Tuple[Dict[str, Dict[str, float]], Dict[str, Any]]] = {}
+        self._load_latencies()
+
+    def _load_latencies(self) -> None:
+        if not self.latency_path:
+            return
+        try:
+            with open(self.latency_path) as f:
+                stored = json.load(f)
+        except (OSError, ValueError):
+            return
+        for name, samples in stored.items():
+            if name in self._latencies:
+                self._latencies[name].extend(float(x) for x in samples)
+
+    def _save_latencies(self) -> None:
+        if not self.latency_path:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.latency_path) or ".", exist_ok=True)
+            tmp = f"{self.latency_path}.{os.getpid()}.tmp"
+            with self._latency_lock:
+                stored = {name: list(samples) for name, samples in self._latencies.items()}
+            with open(tmp, "w") as f:
+                json.dump(stored, f)
+            os.replace(tmp, self.latency_path)
+        except OSError:
+            pass
+
+    def hedge_delay(self, provider_name: str) -> float:
+        with self._latency_lock:
+            ordered = sorted(self._latencies[provider_name])
+        if len(ordered) < self.min_latency_samples:
+            return self.initial_hedge_delay
+        return ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))]
+
+    def _timed_fetch(self, provider: PriceProvider, symbols: List[str]):
+        start = time.monotonic()
+        data = provider.fetch(symbols)
+        latency = time.monotonic() - start
+        with self._latency_lock:
+            self._latencies[provider.name].append(latency)
+        return data, latency
+
+    @staticmethod
+    def _covered(
+        symbols: List[str],
+        active: List[PriceProvider],
+        results: Dict[str, Dict],
+        errors: Dict[str, str],
+        need: int
+    ) -> bool:
+        """
+        True when every symbol has `need` quotes, or every provider that maps
+        it (and has not failed) has already answered.
+        """
+        for sym in symbols:
+            covering = [p.name for p in active if p.supports(sym) and p.name not in errors]
+            quotes = sum(1 for name in covering if name in results and sym in results[name])
+            if quotes >= min(need, len(covering)):
+                continue
+            if any(name not in results for name in covering):
+                return False
+        return True
+
+    def _gather(self, symbols: List[str]) -> Tuple[Dict[str, Dict], Dict[str, str], List[str]]:
+        """
+        Run all providers with hedging. Returns (provider -> data,
+        provider -> error, providers abandoned once the round already had its
+        answer). Abandoned providers are not failures: their calls keep running
+        and still record their latency.
+        """
+        active = [p for p in self.providers if any(p.supports(s) for s in symbols)]
+        start = time.monotonic()
+        deadline = start + self.timeout
+        first_answer: Optional[float] = None
+
+        pending: Dict[Future, PriceProvider] = {}
+        in_flight: Dict[str, int] = {}
+        hedged = set()
+        results: Dict[str, Dict] = {}
+        errors: Dict[str, str] = {}
+
+        def submit(provider):
+            pending[_run_daemon(self._timed_fetch, provider, symbols)] = provider
+            in_flight[provider.name] = in_flight.get(provider.name, 0) + 1
+
+        for provider in active:
+            submit(provider)
+
+        timed_out = False
+        while pending:
+            now = time.monotonic()
+            if now >= deadline:
+                timed_out = True
+                break
+            if self.mode == "quorum" and self._covered(symbols, active, results, errors, self.quorum):
+                break
+            if (
+                self.mode == "median"
+                and first_answer is not None
+                and now >= first_answer + self.median_grace
+                and self._covered(symbols, active, results, errors, 1)
+            ):
+                break
+
+            hedge_times = [
+                start + self.hedge_delay(p.name)
+                for p in active
+                if p.name not in hedged and p.name not in results and p.name not in errors
+            ]
+            wake_times = [deadline] + hedge_times
+            if self.mode == "median" and first_answer is not None:
+                wake_times.append(max(now, first_answer + self.median_grace))
+            wake = min(wake_times)
+            done, _ = wait(list(pending), timeout=max(0.0, wake - now), return_when=FIRST_COMPLETED)
+
+            for future in done:
+                provider = pending.pop(future)
+                in_flight[provider.name] -= 1
+                if provider.name in results:
+                    continue
+                try:
+                    data, _ = future.result()
+                except Exception as e:
+                    if provider.name not in hedged:
+                        # Fail fast: use the backup slot right away
+                        hedged.add(provider.name)
+                        submit(provider)
+                    elif in_flight[provider.name] == 0:
+                        errors[provider.name] = str(e)
+                    continue
+                results[provider.name] = data
+                if first_answer is None:
+                    first_answer = time.monotonic()
+
+            now = time.monotonic()
+            for provider in active:
+                name = provider.name
+                if name in hedged or name in results or name in errors:
+                    continue
+                if now - start >= self.hedge_delay(name):
+                    hedged.add(name)
+                    submit(provider)
+
+        # Anything still running is abandoned; its own timeout bounds the (daemon)
+        # thread. Only running out of `timeout` makes that a failure.
+        abandoned = []
+        for provider in set(pending.values()):
+            if provider.name in results or provider.name in errors:
+                continue
+            if timed_out:
+                errors[provider.name] = "timeout"
+            else:
+                abandoned.append(provider.name)
+
+        return results, errors, sorted(abandoned)
+
+    def fetch_with_meta(self, symbols: List[str]) -> Tuple[Dict[str, Dict[str, Dict[str, float]]], Dict[str, Dict[str, Any]]]:
+        """
+        Returns:
+            (prices, meta). `prices` has the fetch_historical_prices shape.
+            `meta` maps symbol -> {'sources': [...], 'as_of': epoch seconds,
+            'age': seconds, 'stale': bool}.
+        """
+        results, errors, _ = self._gather(symbols)
+        self._save_latencies()
+        now = time.time()
+
+        prices: Dict[str, Dict[str, Dict[str, float]]] = {}
+        meta: Dict[str, Dict[str, Any]] = {}
+
+        for sym in symbols:
+            quotes = {name: data[sym] for name, data in results.items() if sym in data}
+            if quotes:
+                prices[sym] = merge_quotes(list(quotes.values()))
+                meta[sym] = {"sources": sorted(quotes), "as_of": now, "age": 0.0, "stale": False}
+                self._last_good[sym] = (prices[sym], meta[sym])
+                continue
+
+            cached = self._last_good.get(sym)
+            if cached and now - cached[1]['as_of'] <= self.max_stale_age:
+                prices[sym] = cached[0]
+                meta[sym] = dict(cached[1], age=now - cached[1]['as_of'], stale=True)
+
+        for name, err in errors.items():
+            self.log(f"Price source {name} failed: {err}")
+
+        return prices, meta
+
+    def fetch(self, symbols: List[str]) -> Dict[str, Dict[str, Dict[str, float]]]:
+        return self.fetch_with_meta(symbols)[0]
+
+    def close(self) -> None:
+        """Nothing to release: calls run on daemon threads bounded by their own timeouts."""
+
+def merge_quotes(quotes: List[Dict[str, Dict[str, float]]]) -> Dict[str, Dict[str, float]]:
+    """
+    Median across providers per window. The window return is taken as the
+    median ratio current/prev so 'prev' stays consistent with the merged 'current'.
+    """
+    if len(quotes) == 1:
+        return quotes[0]
+
+    merged = {}
+    for window in WINDOWS:
+        points = [q[window] for q in quotes if window in q and q[window]['prev']]
+        if not points:
+            continue
+        current = statistics.median(p['current'] for p in points)
+        ratio = statistics.median(p['current'] / p['prev'] for p in points)
+        merged[window] = {"current": current, "prev": current / ratio}
+    return merged
+
+def default_latency_path() -> str:
+    """Provider latency samples live next to the snapshot cache."""
+    return os.path.join(os.path.dirname(snapshot.default_cache_path()), "provider_latency.json")
+
+def default_fetcher(timeout: float = 10, log: Callable[[str], None] = print) -> ConsensusPriceFetcher:
+    return ConsensusPriceFetcher(
+        [CoinGeckoProvider(timeout=timeout), BinanceProvider(timeout=timeout)],
+        mode="median",
+        timeout=timeout,
+        latency_path=default_latency_path(),
+        log=log
+    )
@@ -1,6 +1,8 @@
-import numpy as np
 import math
-from typing import Dict, List, Any
+from typing import TYPE_CHECKING, Dict, List, Any, Optional
+
+if TYPE_CHECKING:
+    import numpy as np
 
 # Weights from spec
 # Majors w=1
@@ -16,15 +18,159 @@ BUCKET_WEIGHTS = {
     "memes": 5.0
 }
 
+# Timeframe stack (spec: same metric, different lookback L)
+TIMEFRAMES = ['1h', '24h', '7d']
+
 def calculate_log_return(current: float, prev: float) -> float:
     if prev == 0:
         return 0.0
     return math.log(current / prev)
 
+class BetaTracker:
+    """
+    Rolling beta of each symbol against BTC.
+
+    beta_i = Cov(ret_i, ret_BTC) / Var(ret_BTC), estimated with exponentially
+    weighted accumulators so each symbol costs a fixed 5 floats no matter how
+    many snapshots have been seen. Updates are vectorized over all symbols in
+    the snapshot.
+
+    Feed it non-overlapping returns (see update_from_prices, which uses the
+    change between consecutive snapshots). Lookback window returns taken a
+    minute apart overlap almost entirely, so their co-movement says little
+    about beta.
+
+    Until a symbol has `min_samples` observations (or BTC variance is ~0) its
+    beta is 1.0, which makes the beta-adjusted r_i identical to the plain one.
+
+    numpy is imported on first use so the plain engine stays import-light.
+    """
+
+    def __init__(self, span: int = 30, min_samples: int = 10, capacity: int = 64):
+        import numpy as np
+
+        if span < 1:
+            raise ValueError("span must be >= 1")
+        self.alpha = 2.0 / (span + 1.0)
+        self.min_samples = min_samples
+        self._index: Dict[str, int] = {}
+        self._n = np.zeros(capacity, dtype=np.int64)
+        self._mean_x = np.zeros(capacity)   # symbol return mean
+        self._mean_y = np.zeros(capacity)   # BTC return mean (as seen by this symbol)
+        self._cov = np.zeros(capacity)      # Cov(ret_i, ret_BTC)
+        self._var_y = np.zeros(capacity)    # Var(ret_BTC)
+        self._last_prices: Dict[str, float] = {}
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def _slots(self, symbols: List[str]) -> "np.ndarray":
+        """Map symbols to accumulator slots, registering (and growing) as needed."""
+        import numpy as np
+
+        index = self._index
+        for sym in symbols:
+            if sym not in index:
+                index[sym] = len(index)
+
+        needed = len(index)
+        capacity = len(self._n)
+        if needed > capacity:
+            new_capacity = max(needed, capacity * 2)
+            for name in ("_n", "_mean_x", "_mean_y", "_cov", "_var_y"):
+                old = getattr(self, name)
+                grown = np.zeros(new_capacity, dtype=old.dtype)
+                grown[:capacity] = old
+                setattr(self, name, grown)
+
+        return np.fromiter((index[s] for s in symbols), dtype=np.int64, count=len(symbols))
+
+    def update(self, returns: Dict[str, float], btc_ret: float) -> None:
+        """
+        Fold one snapshot into the accumulators.
+
+        Args:
+            returns: Dict mapping symbol -> log return over the lookback.
+            btc_ret: BTC log return over the same lookback.
+        """
+        import numpy as np
+
+        syms = [s for s in returns if s != 'bitcoin']
+        if not syms:
+            return
+
+        idx = self._slots(syms)
+        x = np.fromiter((returns[s] for s in syms), dtype=float, count=len(syms))
+
+        n = self._n[idx]
+        # 1/(n+1) during warm-up gives plain sample moments, then decays at alpha.
+        a = np.maximum(self.alpha, 1.0 / (n + 1))
+
+        dx = x - self._mean_x[idx]
+        dy = btc_ret - self._mean_y[idx]
+        self._mean_x[idx] += a * dx
+        self._mean_y[idx] += a * dy
+        self._cov[idx] = (1 - a) * (self._cov[idx] + a * dx * dy)
+        self._var_y[idx] = (1 - a) * (self._var_y[idx] + a * dy * dy)
+        self._n[idx] = n + 1
+
+    def update_from_market(self, market_data: Dict[str, Dict[str, float]], btc_data: Dict[str, float]) -> None:
+        """Convenience wrapper taking the same inputs as calculate_risk_metrics."""
+        btc_ret = calculate_log_return(btc_data['current'], btc_data['prev'])
+        returns = {
+            sym: calculate_log_return(data['current'], data['prev'])
+            for sym, data in market_data.items()
+        }
+        self.update(returns, btc_ret)
+
+    def update_from_prices(self, prices: Dict[str, float]) -> None:
+        """
+        Fold the move since the previous call: ln(p_t / p_t-1) per symbol and
+        for BTC. Symbols missing from `prices` forget their last price, so a
+        gap never turns into one multi-interval return. Without a BTC price
+        the call is ignored entirely.
+        """
+        btc = prices.get('bitcoin')
+        if not btc or btc <= 0:
+            return
+
+        last = self._last_prices
+        if last.get('bitcoin'):
+            returns = {
+                sym: calculate_log_return(price, last[sym])
+                for sym, price in prices.items()
+                if sym != 'bitcoin' and price > 0 and last.get(sym)
+            }
+            if returns:
+                self.update(returns, calculate_log_return(btc, last['bitcoin']))
+
+        self._last_prices = {sym: price for sym, price in prices.items() if price > 0}
+
+    def betas(self, symbols: List[str]) -> Dict[str, float]:
+        """Current beta estimate per symbol (1.0 for unknown / warming-up symbols)."""
+        import numpy as np
+
+        known = [s for s in symbols if s in self._index]
+        result = {s: 1.0 for s in symbols}
+        if not known:
+            return result
+
+        idx = np.fromiter((self._index[s] for s in known), dtype=np.int64, count=len(known))
+        var_y = self._var_y[idx]
+        ready = (self._n[idx] >= self.min_samples) & (var_y > 1e-12)
+        beta = np.where(ready, self._cov[idx] / np.where(ready, var_y, 1.0), 1.0)
+
+        result.update(zip(known, beta.tolist()))
+        return result
+
+    def beta(self, symbol: str) -> float:
+        return self.betas([symbol])[symbol]
+
 def calculate_risk_metrics(
     market_data: Dict[str, Dict[str, float]], 
     btc_data: Dict[str, float],
-    buckets: Dict[str, List[str]]
+    buckets: Dict[str, List[str]],
+    beta_tracker: Optional[BetaTracker] = None
 ) -> Dict[str, Any]:
     """
     Calculates the Risk Regime metrics.
@@ -33,6 +179,9 @@ def calculate_risk_metrics(
         market_data: Dict mapping symbol -> {'current': float, 'prev': float}
         btc_data: Dict {'current': float, 'prev': float}
         buckets: Dict mapping bucket_name -> [symbols]
+        beta_tracker: Optional rolling beta estimates. When given, r_i is
+            beta-adjusted (ret_i - beta_i * ret_BTC). The tracker is read,
+            not updated; call BetaTracker.update once per snapshot.
         
     Returns:
         Dict containing raw metrics, bucket scores, and semantic labels.
@@ -44,8 +193,12 @@ def calculate_risk_metrics(
     # 2. Per-symbol relative performance (r_i)
     # r_i = ln(P_i(t)/P_i(t-L)) - ln(P_BTC(t)/P_BTC(t-L))
     #     = Return_i - Return_BTC
+    # Beta-adjusted mode: r_i = Return_i - beta_i * Return_BTC
     
     r_i_map = {}
+    betas = {}
+    if beta_tracker is not None:
+        betas = beta_tracker.betas([s for s in market_data if s != 'bitcoin'])
     
     for sym, data in market_data.items():
         if sym == 'bitcoin': continue
@@ -54,7 +207,7 @@ def calculate_risk_metrics(
         prev = data['prev']
         
         sym_ret = calculate_log_return(curr, prev)
-        r_i = sym_ret - btc_ret
+        r_i = sym_ret - betas.get(sym, 1.0) * btc_ret
         r_i_map[sym] = r_i
 
     # 3. Bucket level strength + breadth
@@ -82,10 +235,10 @@ def calculate_risk_metrics(
             continue
             
         # Strength: S_b = mean(r_i)
-        S_b = np.mean([r_i_map[s] for s in valid_syms])
+        S_b = sum(r_i_map[s] for s in valid_syms) / len(valid_syms)
         
         # Breadth: B_b = mean(1 if r_i > 0 else 0)
-        B_b = np.mean([1.0 if r_i_map[s] > 0 else 0.0 for s in valid_syms])
+        B_b = sum(1.0 for s in valid_syms if r_i_map[s] > 0) / len(valid_syms)
         
         # Bucket Score: Q_b = S_b * (2 * B_b - 1)
         # BUG FIX: success.md formula `S * (2B - 1)` flips sign if S is negative and B is low (0).
@@ -151,6 +304,64 @@ def calculate_risk_metrics(
         "Intensities": intensity_labels
     }
 
+def calculate_timeframe_stack(
+    full_data_map: Dict[str, Dict[str, Dict[str, float]]],
+    buckets: Dict[str, List[str]],
+    timeframes: Optional[List[str]] = None,
+    beta_tracker: Optional[BetaTracker] = None
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Runs calculate_risk_metrics for every timeframe.
+
+    Args:
+        full_data_map: Dict mapping symbol -> window -> {'current', 'prev'}
+        buckets: Dict mapping bucket_name -> [symbols]
+        timeframes: Windows to compute (default TIMEFRAMES)
+        beta_tracker: Optional BetaTracker for beta-adjusted mode; the same
+            betas apply to every window's return
+
+    Returns:
+        Dict mapping timeframe -> calculate_risk_metrics result.
+        Timeframes without BTC data are omitted.
+    """
+    stack = {}
+    for tf in timeframes or TIMEFRAMES:
+        current_map = {s: w[tf] for s, w in full_data_map.items() if tf in w}
+        btc_data = current_map.get("bitcoin")
+        if not btc_data:
+            continue
+        stack[tf] = calculate_risk_metrics(current_map, btc_data, buckets, beta_tracker=beta_tracker)
+    return stack
+
+def update_beta_tracker(
+    full_data_map: Dict[str, Dict[str, Dict[str, float]]],
+    beta_tracker: BetaTracker,
+    freshness: Optional[Dict[str, Dict[str, Any]]] = None
+) -> None:
+    """
+    Folds one snapshot's current prices into the tracker (see
+    BetaTracker.update_from_prices). Symbols served stale from a previous
+    round are left out so the same observation is never counted twice; a
+    stale BTC price skips the round.
+    """
+    freshness = freshness or {}
+
+    def fresh(sym: str) -> bool:
+        return not freshness.get(sym, {}).get('stale')
+
+    if not fresh('bitcoin'):
+        return
+
+    prices = {}
+    for sym, windows in full_data_map.items():
+        if not fresh(sym):
+            continue
+        for tf in TIMEFRAMES:
+            if tf in windows:
+                prices[sym] = windows[tf]['current']
+                break
+    beta_tracker.update_from_prices(prices)
+
 def get_intensity_labels(risk: float, breadth: float, spec_conc: float) -> Dict[str, str]:
     """
     Step 1 of Translation Layer: Convert numbers to semantic intensities.
@@ -0,0 +1,77 @@
+import json
+import os
+import time
+from typing import Any, Dict, List, Optional
+
+from risk_regime_bro import risk_engine
+
+# A snapshot is the unit the rest of the pipeline passes around:
+#   {
+#       "timestamp": epoch seconds the prices were fetched,
+#       "stack": timeframe -> calculate_risk_metrics result,
+#       "freshness": symbol -> {'sources', 'as_of', 'age', 'stale'},
+#       "beta_adjusted": whether r_i was beta-adjusted,
+#   }
+# It is plain JSON so it can be persisted and rendered without recomputing.
+
+def default_cache_path() -> str:
+    """$RISK_REGIME_CACHE, else $XDG_CACHE_HOME (or ~/.cache)/risk_regime_bro/last_snapshot.json."""
+    override = os.environ.get("RISK_REGIME_CACHE")
+    if override:
+        return override
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "risk_regime_bro", "last_snapshot.json")
+
+def build_snapshot(
+    full_data_map: Dict[str, Dict[str, Dict[str, float]]],
+    buckets: Dict[str, List[str]],
+    freshness: Optional[Dict[str, Dict[str, Any]]] = None,
+    timestamp: Optional[float] = None,
+    beta_tracker: Optional[risk_engine.BetaTracker] = None
+) -> Dict[str, Any]:
+    """
+    With `beta_tracker` the stack is beta-adjusted using the betas estimated
+    so far, then this snapshot's fresh prices are folded into the tracker for
+    the next one (see risk_engine.update_beta_tracker).
+    """
+    stack = risk_engine.calculate_timeframe_stack(full_data_map, buckets, beta_tracker=beta_tracker)
+    if beta_tracker is not None:
+        risk_engine.update_beta_tracker(full_data_map, beta_tracker, freshness)
+    return {
+        "timestamp": time.time() if timestamp is None else timestamp,
+        "stack": stack,
+        "freshness": freshness or {},
+        "beta_adjusted": beta_tracker is not None,
+    }
+
+def save_snapshot(snapshot: Dict[str, Any], path: Optional[str] = None) -> None:
+    """Atomically writes the snapshot (tmp file + rename) so readers never see a partial file."""
+    path = path or default_cache_path()
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(snapshot, f)
+    os.replace(tmp, path)
+
+def load_snapshot(path: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """Returns the last persisted snapshot, or None if missing / unreadable."""
+    try:
+        with open(path or default_cache_path()) as f:
+            snapshot = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(snapshot, dict) or "stack" not in snapshot:
+        return None
+    return snapshot
+
+def snapshot_age(snapshot: Dict[str, Any], now: Optional[float] = None) -> float:
+    return max(0.0, (time.time() if now is None else now) - snapshot.get("timestamp", 0.0))
+
+def format_age(seconds: float) -> str:
+    if seconds < 60:
+        return f"{int(seconds)}s"
+    if seconds < 3600:
+        return f"{int(seconds // 60)}m"
+    if seconds < 86400:
+        return f"{int(seconds // 3600)}h{int(seconds % 3600 // 60):02d}m"
+    return f"{int(seconds // 86400)}d"
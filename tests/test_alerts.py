@@ -0,0 +1,242 @@
+import json
+import math
+import random
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+from risk_regime_bro import alerts, risk_engine
+
+BUCKETS = {
+    "majors": ["eth"],
+    "large_alts": ["ada"],
+    "midcaps": ["sui"],
+    "high_beta": ["pepe"],
+    "memes": ["doge"]
+}
+
+def _stack(pct):
+    """One-timeframe stack with every alt moving `pct` vs flat BTC."""
+    full = {"bitcoin": {"24h": {"current": 100.0, "prev": 100.0}}}
+    for sym in ["eth", "ada", "sui", "pepe", "doge"]:
+        full[sym] = {"24h": {"current": 100 * (1 + pct), "prev": 100.0}}
+    return risk_engine.calculate_timeframe_stack(full, BUCKETS, timeframes=['24h'])
+
+class TestRegimeChangeDetector(unittest.TestCase):
+
+    def test_baseline_then_change(self):
+        detector = alerts.RegimeChangeDetector()
+        self.assertEqual(detector.observe(_stack(0.02), timestamp=0), [])
+
+        events = detector.observe(_stack(-0.25), timestamp=1)
+        regime = [e for e in events if e["kind"] == "regime"]
+        self.assertEqual(len(regime), 1)
+        self.assertEqual(regime[0]["old"], "Broad Risk-On")
+        self.assertEqual(regime[0]["new"], "Liquidation Mode")
+        self.assertEqual(regime[0]["timeframe"], "24h")
+
+        # Same regime again: nothing new
+        self.assertEqual(detector.observe(_stack(-0.25), timestamp=2), [])
+
+    def test_debounce_snapshots(self):
+        detector = alerts.RegimeChangeDetector(debounce_snapshots=2)
+        detector.observe(_stack(0.02), timestamp=0)
+        # One-snapshot blip is swallowed
+        self.assertEqual(detector.observe(_stack(-0.25), timestamp=1), [])
+        self.assertEqual(detector.observe(_stack(0.02), timestamp=2), [])
+        # Two in a row is confirmed
+        detector.observe(_stack(-0.25), timestamp=3)
+        events = detector.observe(_stack(-0.25), timestamp=4)
+        self.assertIn("Liquidation Mode", [e["new"] for e in events])
+
+    def test_debounce_seconds(self):
+        detector = alerts.RegimeChangeDetector(debounce_seconds=10)
+        detector.observe(_stack(0.02), timestamp=0)
+        self.assertEqual(detector.observe(_stack(-0.25), timestamp=1), [])
+        self.assertNotEqual(detector.observe(_stack(-0.25), timestamp=12), [])
+
+    def test_hysteresis_blocks_flapping(self):
+        """RISK hovering around the 0.2 Heavy boundary."""
+        below, above = _stack(0.0130), _stack(0.0138)   # RISK ~ 0.194 / 0.206
+
+        plain = alerts.RegimeChangeDetector()
+        plain.observe(below, timestamp=0)
+        self.assertIn("Modifier", [e["field"] for e in plain.observe(above, timestamp=1)])
+
+        damped = alerts.RegimeChangeDetector(hysteresis=0.05)
+        damped.observe(below, timestamp=0)
+        self.assertNotIn("Modifier", [e["field"] for e in damped.observe(above, timestamp=1)])
+
+    def test_regime_change_at_constant_risk(self):
+        """Broad Risk-On -> Degenerate Send driven by breadth / SpecConc while RISK stays put."""
+        def stack(updates):
+            full = {"bitcoin": {"24h": {"current": 100.0, "prev": 100.0}}}
+            for sym, curr in updates.items():
+                full[sym] = {"24h": {"current": curr, "prev": 100.0}}
+            return risk_engine.calculate_timeframe_stack(full, BUCKETS, timeframes=['24h'])
+
+        # Every bucket +5.1%: RISK = 15 * ln(1.051) ~ 0.746
+        broad = stack({s: 105.1 for s in ["eth", "ada", "sui", "pepe", "doge"]})
+        # Memes alone carry the same RISK: 5 * ln(x) = 0.746
+        memes_only = stack({"doge": 100 * math.exp(broad["24h"]["RISK"] / 5)})
+        self.assertAlmostEqual(broad["24h"]["RISK"], memes_only["24h"]["RISK"])
+        self.assertEqual(broad["24h"]["Regime"]["Primary"], "Broad Risk-On")
+        self.assertEqual(memes_only["24h"]["Regime"]["Primary"], "Degenerate Send")
+
+        detector = alerts.RegimeChangeDetector(debounce_snapshots=2, hysteresis=0.02)
+        detector.observe(broad, timestamp=0)
+        events = detector.observe(memes_only, timestamp=1) + detector.observe(memes_only, timestamp=2)
+        regime = [e for e in events if e["kind"] == "regime"]
+        self.assertEqual(len(regime), 1)
+        self.assertEqual(regime[0]["new"], "Degenerate Send")
+
+    def test_hysteresis_damps_breadth_jitter(self):
+        """Participation flapping across the 0.6 breadth line (3/5 -> 2/5 outperforming)."""
+        def stack(positive):
+            full = {"bitcoin": {"24h": {"current": 100.0, "prev": 100.0}}}
+            for i, sym in enumerate(["eth", "ada", "sui", "pepe", "doge"]):
+                full[sym] = {"24h": {"current": 100.1 if i < positive else 99.99, "prev": 100.0}}
+            return risk_engine.calculate_timeframe_stack(full, BUCKETS, timeframes=['24h'])
+
+        def participation_events(hysteresis):
+            detector = alerts.RegimeChangeDetector(hysteresis=hysteresis)
+            detector.observe(stack(3), timestamp=0)
+            return [e for e in detector.observe(stack(2), timestamp=1) if e["field"] == "Participation"]
+
+        self.assertEqual(len(participation_events(0.0)), 1)
+        self.assertEqual(participation_events(0.3), [])
+
+    def test_risk_crossing_zero_with_bucket_noise(self):
+        """RISK alternating +-0.001 while every bucket score moves: no regime flapping."""
+        weights = {"eth": 1, "ada": 2, "sui": 3, "pepe": 4}
+        rng = random.Random(11)
+
+        def stack(risk):
+            # One symbol per bucket and flat BTC, so wQ = weight * r and RISK = sum(wQ)
+            full = {"bitcoin": {"24h": {"current": 100.0, "prev": 100.0}}}
+            returns = {sym: rng.gauss(0, 0.005) for sym in weights}
+            returns["doge"] = (risk - sum(w * returns[s] for s, w in weights.items())) / 5
+            for sym, r in returns.items():
+                full[sym] = {"24h": {"current": 100 * math.exp(r), "prev": 100.0}}
+            return risk_engine.calculate_timeframe_stack(full, BUCKETS, timeframes=['24h'])
+
+        stacks = [stack(0.001 if i % 2 else -0.001) for i in range(40)]
+
+        def regime_events(hysteresis):
+            detector = alerts.RegimeChangeDetector(hysteresis=hysteresis)
+            events = []
+            for ts, st in enumerate(stacks):
+                events += detector.observe(st, timestamp=ts)
+            return [e for e in events if e["field"] == "Primary"], detector
+
+        flapping, _ = regime_events(0.0)
+        self.assertGreater(len(flapping), 10)
+
+        # Breadth steps are 1/5 here, so give it a margin of more than one step
+        margins = dict(alerts.scaled_hysteresis(0.02), Breadth_total=0.25)
+        damped, detector = regime_events(margins)
+        self.assertEqual(damped, [])
+
+        # A real move well past the boundary still gets through
+        events = detector.observe(_stack(0.02), timestamp=100)
+        self.assertIn("Broad Risk-On", [e["new"] for e in events if e["field"] == "Primary"])
+
+    def test_hysteresis_rejects_unknown_metric(self):
+        with self.assertRaises(ValueError):
+            alerts.RegimeChangeDetector(hysteresis={"Breadth": 0.1})
+
+class _Collector(BaseHTTPRequestHandler):
+    received = []
+    fail_first = 0
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        if _Collector.fail_first > 0:
+            _Collector.fail_first -= 1
+            self.send_response(503)
+            self.end_headers()
+            return
+        _Collector.received.append(json.loads(body))
+        self.send_response(204)
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+class TestAlertDispatcher(unittest.TestCase):
+
+    def setUp(self):
+        _Collector.received = []
+        _Collector.fail_first = 0
+        self.server = HTTPServer(("127.0.0.1", 0), _Collector)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self.server.server_port}/hook"
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def _events(self, n):
+        detector = alerts.RegimeChangeDetector()
+        detector.observe(_stack(0.02), timestamp=0)
+        events = detector.observe(_stack(-0.25), timestamp=1)
+        return (events * n)[:n]
+
+    def test_webhook_batching_and_latency(self):
+        dispatcher = alerts.AlertDispatcher([alerts.WebhookSink(self.url)], max_batch=10, max_wait=0.2)
+        dispatcher.submit(self._events(15))
+        self.assertTrue(dispatcher.flush(timeout=5))
+        dispatcher.close()
+
+        delivered = [e for batch in _Collector.received for e in batch["events"]]
+        self.assertEqual(len(delivered), 15)
+        self.assertLessEqual(max(len(b["events"]) for b in _Collector.received), 10)
+
+        stats = dispatcher.stats()
+        self.assertEqual(stats["delivered"], 15)
+        self.assertGreater(stats["latency_max"], 0)
+        self.assertLessEqual(stats["latency_p50"], stats["latency_p95"])
+
+    def test_retries(self):
+        _Collector.fail_first = 2
+        dispatcher = alerts.AlertDispatcher([alerts.WebhookSink(self.url)], max_retries=3, retry_backoff=0.01)
+        dispatcher.submit(self._events(1))
+        self.assertTrue(dispatcher.flush(timeout=5))
+        dispatcher.close()
+        stats = dispatcher.stats()
+        self.assertEqual(stats["delivered"], 1)
+        self.assertEqual(stats["retries"], 2)
+
+    def test_gives_up_after_retries(self):
+        def boom(batch):
+            raise RuntimeError("sink down")
+        dispatcher = alerts.AlertDispatcher([alerts.CallbackSink(boom)], max_retries=1, retry_backoff=0.01)
+        dispatcher.submit(self._events(2))
+        self.assertTrue(dispatcher.flush(timeout=5))
+        dispatcher.close()
+        self.assertEqual(dispatcher.stats()["failed"], 2)
+
+    def test_dead_sink_does_not_block_healthy_sink(self):
+        received = []
+
+        def dead(batch):
+            raise RuntimeError("sink down")
+
+        dispatcher = alerts.AlertDispatcher(
+            [alerts.CallbackSink(dead, name="dead"), alerts.CallbackSink(received.extend, name="ok")],
+            max_retries=3, retry_backoff=0.5
+        )
+        dispatcher.submit(self._events(1))
+        start = time.monotonic()
+        while not received and time.monotonic() - start < 2:
+            time.sleep(0.005)
+        # The dead sink spends >3 s in backoff; the healthy one delivers right away
+        self.assertEqual(len(received), 1)
+        self.assertLess(time.monotonic() - start, 0.5)
+        stats = dispatcher.stats()
+        self.assertEqual(stats["sinks"]["ok"]["delivered"], 1)
+        dispatcher.close(timeout=0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,109 @@
+import contextlib
+import io
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from benchmarks import run, synthetic
+from benchmarks.replay import ReplayServer
+from risk_regime_bro import market_data, price_sources
+
+
+class TestReplayHarness(unittest.TestCase):
+
+    def test_replay_server_matches_recorded_parse(self):
+        payload, buckets = run.load_recorded()
+        symbols = ["bitcoin", "ethereum", "dogecoin"]
+        with ReplayServer(payload) as server:
+            fetched = price_sources.CoinGeckoProvider(base_url=server.base_url).fetch(symbols)
+            self.assertEqual(server.requests, 1)
+        expected = market_data.parse_markets_payload(payload)
+        self.assertEqual(sorted(fetched), sorted(symbols))
+        self.assertEqual(fetched["ethereum"], expected["ethereum"])
+
+    def test_synthetic_universe(self):
+        payload, buckets = synthetic.make_universe(20)
+        self.assertEqual(len(payload), 21)
+        self.assertEqual(sum(len(syms) for syms in buckets.values()), 20)
+        self.assertEqual(payload, synthetic.make_payload(20))  # seeded
+
+    def test_suite_smoke(self):
+        metrics = run.run_suite([20], min_time=0.0, log=lambda msg: None, rounds=2)
+        for key in ["parse_ms/20", "snapshots_per_s/20", "snapshot_kb/20", "refresh_ms_p95/recorded"]:
+            self.assertGreater(metrics[key]["value"], 0)
+
+class TestRegressionCheck(unittest.TestCase):
+
+    def test_compare_directions(self):
+        baseline = {
+            "parse_ms/20": {"value": 1.0, "better": "lower"},
+            "snapshots_per_s/20": {"value": 100.0, "better": "higher"},
+        }
+        current = {
+            "parse_ms/20": {"value": 1.2, "better": "lower"},         # 20% slower
+            "snapshots_per_s/20": {"value": 50.0, "better": "higher"},  # 2x slower
+            "snapshot_kb/20": {"value": 5.0, "better": "lower"},       # not in baseline
+        }
+        rows = {r["metric"]: r for r in run.compare(current, baseline, threshold=0.3)}
+        self.assertFalse(rows["parse_ms/20"]["regressed"])
+        self.assertTrue(rows["snapshots_per_s/20"]["regressed"])
+        self.assertAlmostEqual(rows["snapshots_per_s/20"]["ratio"], 2.0)
+        self.assertIsNone(rows["snapshot_kb/20"]["baseline"])
+        self.assertFalse(rows["snapshot_kb/20"]["regressed"])
+
+        rows = {r["metric"]: r for r in run.compare(current, baseline, threshold=0.1)}
+        self.assertTrue(rows["parse_ms/20"]["regressed"])
+
+    def test_compare_noise_floor_and_tail_threshold(self):
+        baseline = {
+            "parse_ms/recorded": {"value": 0.02, "better": "lower"},
+            "snapshots_per_s/recorded": {"value": 20000.0, "better": "higher"},
+            "refresh_ms_p95/250": {"value": 8.0, "better": "lower"},
+            "refresh_ms_p50/250": {"value": 7.0, "better": "lower"},
+        }
+        current = {
+            "parse_ms/recorded": {"value": 0.04, "better": "lower"},          # 2x, but +0.02 ms
+            "snapshots_per_s/recorded": {"value": 12000.0, "better": "higher"}, # 1.7x, but +0.03 ms/snapshot
+            "refresh_ms_p95/250": {"value": 12.0, "better": "lower"},         # +50%: inside the tail allowance
+            "refresh_ms_p50/250": {"value": 10.5, "better": "lower"},         # +50%, +3.5 ms
+        }
+        rows = {r["metric"]: r for r in run.compare(current, baseline, threshold=0.3)}
+        self.assertAlmostEqual(rows["parse_ms/recorded"]["ratio"], 2.0)
+        self.assertFalse(rows["parse_ms/recorded"]["regressed"])
+        self.assertFalse(rows["snapshots_per_s/recorded"]["regressed"])
+        self.assertFalse(rows["refresh_ms_p95/250"]["regressed"])
+        self.assertTrue(rows["refresh_ms_p50/250"]["regressed"])
+
+        current["refresh_ms_p95/250"] = {"value": 16.0, "better": "lower"}  # 2x
+        rows = {r["metric"]: r for r in run.compare(current, baseline, threshold=0.3)}
+        self.assertTrue(rows["refresh_ms_p95/250"]["regressed"])
+
+    def test_meta_mismatch(self):
+        here = run.run_meta()
+        self.assertEqual(run.meta_mismatch(here, dict(here, created="earlier")), [])
+        other = dict(here, python="2.7.18", cpus=-1)
+        self.assertEqual(run.meta_mismatch(here, other), ["python", "cpus"])
+        self.assertEqual(run.meta_mismatch(here, {}), list(run.BASELINE_META_KEYS))
+
+    def test_gate_skipped_for_foreign_baseline(self):
+        slow = {"parse_ms/20": {"value": 5.0, "better": "lower"}}
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "baseline.json")
+
+            def gate(meta, *flags):
+                with open(path, "w") as f:
+                    json.dump({"meta": meta, "metrics": {"parse_ms/20": {"value": 1.0, "better": "lower"}}}, f)
+                out = io.StringIO()
+                with mock.patch.object(run, "run_suite", return_value=slow), contextlib.redirect_stdout(out):
+                    return run.main(["--baseline", path, "--sizes", "20", *flags]), out.getvalue()
+
+            self.assertEqual(gate(run.run_meta())[0], 1)
+            status, out = gate(dict(run.run_meta(), machine="elsewhere"))
+            self.assertEqual(status, 0)
+            self.assertIn("Skipping the regression gate", out)
+            self.assertEqual(gate(dict(run.run_meta(), machine="elsewhere"), "--ignore-meta")[0], 1)
+
+if __name__ == '__main__':
+    unittest.main()
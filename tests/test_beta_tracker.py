@@ -0,0 +1,131 @@
+import math
+import unittest
+
+import numpy as np
+
+from risk_regime_bro import risk_engine, snapshot
+
+
+class TestBetaTracker(unittest.TestCase):
+
+    def setUp(self):
+        self.buckets = {
+            "majors": ["eth"],
+            "memes": ["doge"]
+        }
+
+    def _feed(self, tracker, n=200, seed=7):
+        """Feed synthetic returns: eth = 1.0 * btc, doge = 2.5 * btc (+ small noise)."""
+        rng = np.random.default_rng(seed)
+        for _ in range(n):
+            btc = rng.normal(0, 0.02)
+            tracker.update({
+                "eth": 1.0 * btc + rng.normal(0, 0.001),
+                "doge": 2.5 * btc + rng.normal(0, 0.001)
+            }, btc)
+
+    def test_warmup_defaults_to_one(self):
+        tracker = risk_engine.BetaTracker(min_samples=5)
+        tracker.update({"doge": 0.05}, 0.02)
+        self.assertEqual(tracker.beta("doge"), 1.0)
+        self.assertEqual(tracker.beta("unknown"), 1.0)
+
+    def test_beta_estimate(self):
+        tracker = risk_engine.BetaTracker(span=50)
+        self._feed(tracker)
+        betas = tracker.betas(["eth", "doge"])
+        self.assertAlmostEqual(betas["eth"], 1.0, delta=0.05)
+        self.assertAlmostEqual(betas["doge"], 2.5, delta=0.1)
+
+    def test_fixed_memory_and_growth(self):
+        tracker = risk_engine.BetaTracker(capacity=4)
+        returns = {f"sym{i}": 0.01 * i for i in range(1000)}
+        for _ in range(3):
+            tracker.update(returns, 0.01)
+        self.assertEqual(len(tracker), 1000)
+        # Re-feeding the same universe must not allocate more slots
+        capacity = len(tracker._n)
+        tracker.update(returns, 0.02)
+        self.assertEqual(len(tracker._n), capacity)
+
+    def test_high_beta_not_risk_on_from_btc_move(self):
+        """
+        BTC +4%, DOGE +10% (exactly 2.5x beta).
+        Plain mode calls that outperformance; beta-adjusted mode calls it flat.
+        """
+        tracker = risk_engine.BetaTracker(span=50)
+        self._feed(tracker)
+
+        btc_data = {"current": 100 * math.exp(0.04), "prev": 100}
+        market_data = {
+            "bitcoin": btc_data,
+            "eth": {"current": 100 * math.exp(0.04), "prev": 100},
+            "doge": {"current": 100 * math.exp(0.10), "prev": 100}
+        }
+
+        plain = risk_engine.calculate_risk_metrics(market_data, btc_data, self.buckets)
+        adjusted = risk_engine.calculate_risk_metrics(market_data, btc_data, self.buckets, beta_tracker=tracker)
+
+        self.assertGreater(plain['Buckets']['memes']['S_b'], 0.05)
+        self.assertAlmostEqual(adjusted['Buckets']['memes']['S_b'], 0.0, delta=0.01)
+        self.assertLess(abs(adjusted['RISK']), abs(plain['RISK']))
+
+    def test_update_from_market_skips_btc(self):
+        tracker = risk_engine.BetaTracker()
+        btc_data = {"current": 101.0, "prev": 100.0}
+        tracker.update_from_market({"bitcoin": btc_data, "eth": {"current": 102.0, "prev": 100.0}}, btc_data)
+        self.assertEqual(len(tracker), 1)
+
+    def _full(self, prices):
+        return {sym: {tf: {"current": p, "prev": 100.0} for tf in risk_engine.TIMEFRAMES} for sym, p in prices.items()}
+
+    def test_build_snapshot_estimates_beta_from_snapshot_moves(self):
+        """doge moves 2.5x BTC between snapshots; the lookback windows carry no signal."""
+        tracker = risk_engine.BetaTracker(span=50)
+        rng = np.random.default_rng(3)
+        btc, eth, doge = 100.0, 100.0, 100.0
+        snap = None
+        for _ in range(200):
+            step = rng.normal(0, 0.002)
+            btc *= math.exp(step)
+            eth *= math.exp(step + rng.normal(0, 0.0005))
+            doge *= math.exp(2.5 * step + rng.normal(0, 0.0005))
+            snap = snapshot.build_snapshot(self._full({"bitcoin": btc, "eth": eth, "doge": doge}), self.buckets,
+                                           beta_tracker=tracker)
+        assert snap is not None
+        self.assertTrue(snap["beta_adjusted"])
+        self.assertFalse(snapshot.build_snapshot(self._full({"bitcoin": btc}), self.buckets)["beta_adjusted"])
+        betas = tracker.betas(["eth", "doge"])
+        self.assertAlmostEqual(betas["eth"], 1.0, delta=0.1)
+        self.assertAlmostEqual(betas["doge"], 2.5, delta=0.2)
+
+    def _counts(self, tracker):
+        return {s: int(tracker._n[tracker._index[s]]) for s in ("eth", "doge")}
+
+    def test_stale_prices_not_recounted(self):
+        tracker = risk_engine.BetaTracker()
+        fresh = {"bitcoin": {"stale": False}, "eth": {"stale": False}, "doge": {"stale": False}}
+        for btc in (100.0, 101.0):
+            snapshot.build_snapshot(self._full({"bitcoin": btc, "eth": btc, "doge": btc}), self.buckets, fresh,
+                                    beta_tracker=tracker)
+        self.assertEqual(self._counts(tracker), {"eth": 1, "doge": 1})
+
+        # eth served from last good: only doge gets an observation
+        stale_eth = dict(fresh, eth={"stale": True})
+        snapshot.build_snapshot(self._full({"bitcoin": 102.0, "eth": 101.0, "doge": 102.0}), self.buckets, stale_eth,
+                                beta_tracker=tracker)
+        self.assertEqual(self._counts(tracker), {"eth": 1, "doge": 2})
+
+        # stale BTC skips the whole round
+        stale_btc = dict(fresh, bitcoin={"stale": True})
+        snapshot.build_snapshot(self._full({"bitcoin": 102.0, "eth": 103.0, "doge": 103.0}), self.buckets, stale_btc,
+                                beta_tracker=tracker)
+        self.assertEqual(self._counts(tracker), {"eth": 1, "doge": 2})
+
+        # eth comes back: its gap re-seeds instead of yielding a multi-interval return
+        snapshot.build_snapshot(self._full({"bitcoin": 103.0, "eth": 104.0, "doge": 104.0}), self.buckets, fresh,
+                                beta_tracker=tracker)
+        self.assertEqual(self._counts(tracker), {"eth": 1, "doge": 3})
+
+if __name__ == '__main__':
+    unittest.main()
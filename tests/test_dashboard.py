@@ -0,0 +1,92 @@
+import io
+import os
+import tempfile
+import unittest
+
+from risk_regime_bro import dashboard, snapshot
+
+BUCKETS = {"majors": ["eth"], "memes": ["doge"]}
+
+def _snapshot(eth, doge, timestamp):
+    full = {"bitcoin": {"24h": {"current": 100.0, "prev": 100.0}}}
+    full["eth"] = {"24h": {"current": float(eth), "prev": 100.0}}
+    full["doge"] = {"24h": {"current": float(doge), "prev": 100.0}}
+    return snapshot.build_snapshot(full, BUCKETS, timestamp=timestamp)
+
+class TestScreenBuffer(unittest.TestCase):
+
+    def test_first_frame_is_full_then_nothing(self):
+        out = io.StringIO()
+        screen = dashboard.ScreenBuffer(out)
+        screen.draw(["hello", "world"], (20, 4))
+        self.assertTrue(out.getvalue().startswith("\x1b[H\x1b[2J"))
+
+        before = screen.bytes_written
+        screen.draw(["hello", "world"], (20, 4))
+        self.assertEqual(screen.bytes_written, before)
+
+    def test_only_changed_cells_are_written(self):
+        out = io.StringIO()
+        screen = dashboard.ScreenBuffer(out)
+        screen.draw(["RISK +0.1234 Broad Risk-On", "static line"], (40, 4))
+        out.seek(0)
+        out.truncate()
+
+        screen.draw(["RISK +0.1299 Broad Risk-On", "static line"], (40, 4))
+        # Row 1, column 11: just the two changed digits
+        self.assertEqual(out.getvalue(), "\x1b[1;11H99")
+
+    def test_distant_changes_split_into_runs(self):
+        runs = dashboard.ScreenBuffer._changed_runs("a" + " " * 30 + "b", "x" + " " * 30 + "y")
+        self.assertEqual(runs, [(0, 1), (31, 32)])
+        runs = dashboard.ScreenBuffer._changed_runs("abcd", "xbcy")
+        self.assertEqual(runs, [(0, 4)])
+
+    def test_resize_forces_full_redraw(self):
+        out = io.StringIO()
+        screen = dashboard.ScreenBuffer(out)
+        screen.draw(["a"], (10, 3))
+        screen.draw(["a"], (12, 3))
+        self.assertEqual(out.getvalue().count("\x1b[2J"), 2)
+
+class TestDashboard(unittest.TestCase):
+
+    def test_sparkline(self):
+        self.assertEqual(dashboard.sparkline([0, 1, 2, 3, 4, 5, 6, 7], 8), "▁▂▃▄▅▆▇█")
+        self.assertEqual(len(dashboard.sparkline(list(range(100)), 10)), 10)
+        self.assertEqual(dashboard.sparkline([], 10), "")
+
+    def test_history_and_regime_changes(self):
+        board = dashboard.Dashboard()
+        self.assertTrue(board.update(_snapshot(105, 110, timestamp=1)))
+        self.assertTrue(board.update(_snapshot(80, 70, timestamp=2)))
+        # Older or repeated snapshots are ignored
+        self.assertFalse(board.update(_snapshot(105, 110, timestamp=2)))
+
+        self.assertEqual(len(board.risk_history["24h"]), 2)
+        self.assertEqual(len(board.regime_changes), 1)
+
+        text = "\n".join(board.render_lines(120, now=62))
+        self.assertIn("snapshot 1m old", text)
+        self.assertIn("Regime changes:", text)
+        self.assertIn("majors", text)
+
+    def test_run_follows_file_without_fetching(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "snap.json")
+            source = dashboard.SnapshotFileSource(path)
+            self.assertIsNone(source.poll())
+
+            snapshot.save_snapshot(_snapshot(105, 110, timestamp=1), path)
+            self.assertIsNotNone(source.poll())
+            self.assertIsNone(source.poll())
+
+            source = dashboard.SnapshotFileSource(path)
+            out = io.StringIO()
+            screen = dashboard.run(source, interval=0, out=out, iterations=3)
+            self.assertEqual(screen.frames, 3)
+            self.assertIn("24h", out.getvalue())
+            self.assertTrue(out.getvalue().endswith("\x1b[?25h\x1b[?1049l"))
+
+if __name__ == '__main__':
+    unittest.main()
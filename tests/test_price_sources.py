@@ -0,0 +1,211 @@
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+from risk_regime_bro import market_data, price_sources
+
+
+def _quote(current, prev):
+    return {w: {"current": float(current), "prev": float(prev)} for w in price_sources.WINDOWS}
+
+class TestConsensusPricing(unittest.TestCase):
+
+    def setUp(self):
+        self.fetchers = []
+
+    def tearDown(self):
+        for f in self.fetchers:
+            f.close()
+
+    def _fetcher(self, providers, **kwargs):
+        fetcher = price_sources.ConsensusPriceFetcher(providers, **kwargs)
+        self.fetchers.append(fetcher)
+        return fetcher
+
+    def test_median_across_providers(self):
+        providers = [
+            price_sources.StubProvider("a", {"bitcoin": _quote(100, 100)}),
+            price_sources.StubProvider("b", {"bitcoin": _quote(102, 100)}),
+            price_sources.StubProvider("c", {"bitcoin": _quote(150, 100)})  # outlier
+        ]
+        prices, meta = self._fetcher(providers).fetch_with_meta(["bitcoin"])
+        self.assertAlmostEqual(prices["bitcoin"]["24h"]["current"], 102)
+        self.assertAlmostEqual(prices["bitcoin"]["24h"]["prev"], 100)
+        self.assertEqual(meta["bitcoin"]["sources"], ["a", "b", "c"])
+        self.assertFalse(meta["bitcoin"]["stale"])
+
+    def test_id_mapping(self):
+        binance_like = price_sources.StubProvider(
+            "binance", {"ETHUSDT": _quote(10, 9)}, id_map={"ethereum": "ETHUSDT"}
+        )
+        prices, meta = self._fetcher([binance_like]).fetch_with_meta(["ethereum", "pepe"])
+        self.assertIn("ethereum", prices)
+        self.assertNotIn("pepe", prices)
+        self.assertEqual(meta["ethereum"]["sources"], ["binance"])
+
+    def test_survives_provider_outage(self):
+        providers = [
+            price_sources.StubProvider("down", {}, fail=True),
+            price_sources.StubProvider("up", {"bitcoin": _quote(100, 99)})
+        ]
+        prices, meta = self._fetcher(providers).fetch_with_meta(["bitcoin"])
+        self.assertEqual(meta["bitcoin"]["sources"], ["up"])
+        # The failing provider got its backup request
+        self.assertEqual(providers[0].calls, 2)
+
+    def test_stale_fallback(self):
+        provider = price_sources.StubProvider("a", {"bitcoin": _quote(100, 99)})
+        fetcher = self._fetcher([provider])
+        fetcher.fetch(["bitcoin"])
+
+        provider.fail = True
+        prices, meta = fetcher.fetch_with_meta(["bitcoin"])
+        self.assertEqual(prices["bitcoin"]["1h"]["current"], 100)
+        self.assertTrue(meta["bitcoin"]["stale"])
+
+    def test_hedge_after_p95(self):
+        provider = price_sources.StubProvider("slow", {"bitcoin": _quote(1, 1)})
+        fetcher = self._fetcher([provider], initial_hedge_delay=0.05, min_latency_samples=5)
+        for _ in range(5):
+            fetcher.fetch(["bitcoin"])
+        self.assertEqual(provider.calls, 5)
+        self.assertLess(fetcher.hedge_delay("slow"), 0.05)
+
+        provider.delay = 0.2
+        fetcher.fetch(["bitcoin"])
+        self.assertEqual(provider.calls, 7)
+
+    def test_quorum_cuts_tail_latency(self):
+        providers = [
+            price_sources.StubProvider("fast", {"bitcoin": _quote(100, 100)}),
+            price_sources.StubProvider("slow", {"bitcoin": _quote(100, 100)}, delay=1.0)
+        ]
+        fetcher = self._fetcher(providers, mode="quorum", quorum=1, initial_hedge_delay=5)
+        start = time.monotonic()
+        prices, meta = fetcher.fetch_with_meta(["bitcoin"])
+        self.assertLess(time.monotonic() - start, 0.5)
+        self.assertEqual(meta["bitcoin"]["sources"], ["fast"])
+
+    def test_quorum_counts_per_symbol(self):
+        """A fast provider that doesn't map a symbol must not satisfy the quorum for it."""
+        binance_like = price_sources.StubProvider(
+            "binance", {"BTCUSDT": _quote(100, 100)}, id_map={"bitcoin": "BTCUSDT"}
+        )
+        gecko_like = price_sources.StubProvider(
+            "coingecko", {"bitcoin": _quote(100, 100), "popcat": _quote(1, 1)}, delay=0.1
+        )
+        fetcher = self._fetcher([binance_like, gecko_like], mode="quorum", quorum=1, initial_hedge_delay=5)
+        prices, meta = fetcher.fetch_with_meta(["bitcoin", "popcat"])
+        self.assertIn("popcat", prices)
+        self.assertEqual(meta["popcat"]["sources"], ["coingecko"])
+
+    def test_median_grace_bounds_slow_provider(self):
+        providers = [
+            price_sources.StubProvider("fast", {"bitcoin": _quote(100, 100)}),
+            price_sources.StubProvider("slow", {"bitcoin": _quote(100, 100)}, delay=1.0)
+        ]
+        fetcher = self._fetcher(providers, median_grace=0.1, initial_hedge_delay=5)
+        start = time.monotonic()
+        prices, meta = fetcher.fetch_with_meta(["bitcoin"])
+        self.assertLess(time.monotonic() - start, 0.5)
+        self.assertEqual(meta["bitcoin"]["sources"], ["fast"])
+
+    def test_grace_abandoned_provider_is_not_a_failure(self):
+        providers = [
+            price_sources.StubProvider("fast", {"bitcoin": _quote(100, 100)}),
+            price_sources.StubProvider("slow", {"bitcoin": _quote(100, 100)}, delay=0.3)
+        ]
+        fetcher = self._fetcher(providers, median_grace=0.05, initial_hedge_delay=5)
+        with mock.patch("builtins.print") as printed:
+            results, errors, abandoned = fetcher._gather(["bitcoin"])
+            fetcher.fetch_with_meta(["bitcoin"])
+        self.assertEqual(sorted(results), ["fast"])
+        self.assertEqual(errors, {})
+        self.assertEqual(abandoned, ["slow"])
+        printed.assert_not_called()
+
+        # The abandoned calls still report how slow the provider really is
+        time.sleep(0.4)
+        self.assertEqual(len(fetcher._latencies["slow"]), 2)
+        self.assertGreaterEqual(min(fetcher._latencies["slow"]), 0.3)
+
+    def test_median_waits_for_uncovered_symbols(self):
+        providers = [
+            price_sources.StubProvider("fast", {"bitcoin": _quote(100, 100)}, id_map={"bitcoin": "bitcoin"}),
+            price_sources.StubProvider("slow", {"bitcoin": _quote(100, 100), "popcat": _quote(1, 1)}, delay=0.3)
+        ]
+        fetcher = self._fetcher(providers, median_grace=0.0, initial_hedge_delay=5)
+        prices, meta = fetcher.fetch_with_meta(["bitcoin", "popcat"])
+        self.assertIn("popcat", prices)
+
+    def test_latency_samples_persist(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "latency.json")
+            provider = price_sources.StubProvider("a", {"bitcoin": _quote(1, 1)})
+            for _ in range(3):
+                self._fetcher([provider], latency_path=path).fetch(["bitcoin"])
+            fetcher = self._fetcher([provider], latency_path=path, min_latency_samples=3)
+            self.assertEqual(len(fetcher._latencies["a"]), 3)
+            self.assertLess(fetcher.hedge_delay("a"), fetcher.initial_hedge_delay)
+
+    def test_abandoned_call_does_not_delay_exit(self):
+        script = (
+            "import time\n"
+            "from risk_regime_bro import price_sources as ps\n"
+            "q = {w: {'current': 1.0, 'prev': 1.0} for w in ps.WINDOWS}\n"
+            "f = ps.ConsensusPriceFetcher([ps.StubProvider('fast', {'bitcoin': q}),\n"
+            "    ps.StubProvider('slow', {'bitcoin': q}, delay=4)], median_grace=0.2)\n"
+            "assert f.fetch(['bitcoin'])\n"
+            "f.close()\n"
+        )
+        env = dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path))
+        start = time.monotonic()
+        subprocess.run([sys.executable, "-c", script], env=env, check=True, capture_output=True, timeout=10)
+        self.assertLess(time.monotonic() - start, 2.5)
+
+    def test_binance_windows_fetched_concurrently(self):
+        provider = price_sources.BinanceProvider(timeout=5)
+
+        def slow_window(symbols_param, size):
+            time.sleep(0.2)
+            return [{"symbol": "BTCUSDT", "lastPrice": "101", "openPrice": "100"}]
+
+        with mock.patch.object(provider, "_fetch_window", side_effect=slow_window):
+            start = time.monotonic()
+            data = provider.fetch(["bitcoin"])
+            elapsed = time.monotonic() - start
+        self.assertLess(elapsed, 0.45)
+        self.assertEqual(sorted(data["bitcoin"]), sorted(price_sources.WINDOWS))
+
+    def test_binance_call_bounded_by_timeout(self):
+        provider = price_sources.BinanceProvider(timeout=0.1)
+
+        def hung_window(symbols_param, size):
+            time.sleep(0.5 if size == "7d" else 0)
+            return []
+
+        with mock.patch.object(provider, "_fetch_window", side_effect=hung_window):
+            start = time.monotonic()
+            with self.assertRaises(TimeoutError):
+                provider.fetch(["bitcoin"])
+            self.assertLess(time.monotonic() - start, 0.3)
+
+    def test_parse_markets_payload(self):
+        payload = [{
+            "id": "bitcoin",
+            "current_price": 110.0,
+            "price_change_percentage_1h_in_currency": None,
+            "price_change_percentage_24h": 10.0,
+            "price_change_percentage_7d_in_currency": -50.0
+        }]
+        parsed = market_data.parse_markets_payload(payload)
+        self.assertEqual(parsed["bitcoin"]["1h"]["prev"], 110.0)
+        self.assertAlmostEqual(parsed["bitcoin"]["24h"]["prev"], 100.0)
+        self.assertAlmostEqual(parsed["bitcoin"]["7d"]["prev"], 220.0)
+
+if __name__ == '__main__':
+    unittest.main()
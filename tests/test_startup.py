@@ -0,0 +1,120 @@
+import contextlib
+import io
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+from risk_regime_bro import main, snapshot
+
+BUCKETS = {"majors": ["eth"], "memes": ["doge"]}
+
+def _snapshot(timestamp):
+    full = {
+        "bitcoin": {"24h": {"current": 100.0, "prev": 100.0}},
+        "eth": {"24h": {"current": 105.0, "prev": 100.0}},
+        "doge": {"24h": {"current": 110.0, "prev": 100.0}}
+    }
+    return snapshot.build_snapshot(full, BUCKETS, timestamp=timestamp)
+
+class TestFastStart(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache = os.path.join(self.tmp.name, "snap.json")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _run(self, argv):
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            main.main(argv + ["--cache", self.cache])
+        return out.getvalue()
+
+    def test_import_is_light(self):
+        code = "import sys, risk_regime_bro.main; print(sorted(m for m in ('requests', 'numpy', 'pandas') if m in sys.modules))"
+        env = dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path))
+        out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, env=env, check=True)
+        self.assertEqual(out.stdout.strip(), "[]")
+
+    def test_snapshot_roundtrip(self):
+        snap = _snapshot(timestamp=1000.0)
+        snapshot.save_snapshot(snap, self.cache)
+        loaded = snapshot.load_snapshot(self.cache)
+        assert loaded is not None
+        self.assertEqual(loaded["timestamp"], 1000.0)
+        self.assertAlmostEqual(loaded["stack"]["24h"]["RISK"], snap["stack"]["24h"]["RISK"])
+        self.assertIsNone(snapshot.load_snapshot(os.path.join(self.tmp.name, "missing.json")))
+
+    def test_cached_mode_renders_without_network(self):
+        import time
+        snapshot.save_snapshot(_snapshot(timestamp=time.time() - 125), self.cache)
+        with mock.patch.object(main, "fetch_snapshot", side_effect=AssertionError("no fetch")):
+            out = self._run(["--cached", "--max-age", "3600"])
+        self.assertIn("Snapshot: 2m old (cached)", out)
+        self.assertIn("24h", out)
+
+    def test_renders_cache_then_redraws(self):
+        snapshot.save_snapshot(_snapshot(timestamp=1.0), self.cache)
+        fresh = _snapshot(timestamp=None)
+        with mock.patch.object(main, "fetch_snapshot", return_value=fresh):
+            out = self._run([])
+        self.assertLess(out.index("(cached, refreshing...)"), out.index("Snapshot: live"))
+        # Fresh snapshot persisted for the next start
+        persisted = snapshot.load_snapshot(self.cache)
+        assert persisted is not None
+        self.assertEqual(persisted["timestamp"], fresh["timestamp"])
+
+    def test_fetch_diagnostics_printed_after_redraw(self):
+        cached = _snapshot(timestamp=1.0)
+        snapshot.save_snapshot(cached, self.cache)
+        cached_lines = main.render_snapshot(cached, cached=True, refreshing=True)
+        fresh = _snapshot(timestamp=None)
+
+        def fetch(log=print):
+            log("Price source binance failed: timeout")
+            return fresh
+
+        out = io.StringIO()
+        out.isatty = lambda: True
+        with mock.patch.object(main, "fetch_snapshot", side_effect=fetch), mock.patch.object(sys, "stdout", out):
+            main.main(["--cache", self.cache])
+        text = out.getvalue()
+        # Cursor goes up over the cached render only, and the note lands below the new one
+        self.assertIn(f"\x1b[{len(cached_lines)}F\x1b[J", text)
+        self.assertLess(text.index("\x1b[J"), text.index("Price source binance failed"))
+        self.assertLess(text.index("Snapshot: live"), text.index("Price source binance failed"))
+
+    def test_refresh_failure_keeps_cache(self):
+        snapshot.save_snapshot(_snapshot(timestamp=1.0), self.cache)
+        with mock.patch.object(main, "fetch_snapshot", return_value=None):
+            out = self._run([])
+        self.assertIn("Refresh failed", out)
+
+    def test_background_refresh_lock(self):
+        lock = self.cache + ".lock"
+        with mock.patch("subprocess.Popen") as popen:
+            threads = [threading.Thread(target=main._spawn_background_refresh, args=(self.cache,)) for _ in range(8)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+            self.assertEqual(popen.call_count, 1)
+
+            # A lock left behind by a refresh that died long ago is taken over
+            os.utime(lock, (0, 0))
+            main._spawn_background_refresh(self.cache)
+            self.assertEqual(popen.call_count, 2)
+            self.assertGreater(os.path.getmtime(lock), 0)
+
+    def test_format_age(self):
+        self.assertEqual(snapshot.format_age(5), "5s")
+        self.assertEqual(snapshot.format_age(600), "10m")
+        self.assertEqual(snapshot.format_age(3720), "1h02m")
+
+if __name__ == '__main__':
+    unittest.main()